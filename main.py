@@ -4,41 +4,94 @@ from kivy.core.window import Window
 from kivy.clock import Clock
 from kivy.core.audio import SoundLoader
 from kivy.uix.label import Label
-from kivy.graphics import Rectangle, Color
+from kivy.core.image import Image as CoreImage
+from kivy.core.text import Label as CoreLabel
+from kivy.graphics import Rectangle, Color, Mesh, InstructionGroup
+from kivy.graphics.texture import Texture
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
-import random
-import math
-
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
-FPS = 60
-
-class GameObject(Widget):
-    def move(self):
-        pass
-
-class Player(GameObject):
+import json
+import os
+import time
+import numpy as np
+from src.audio import AudioManager, VOICES
+from src.bundle import AssetBundle
+from src.gc_control import GCControl
+from src.loader import AssetLoader, MANIFEST
+from src.particle import ParticleSystem
+from src.profiler import FrameProfiler
+from src.quality import QualityGovernor
+from src.simulation import Simulation, EXPLOSION, PLAYER_SIZE, BULLET_SIZE, BULLET_ANGLES
+from src.constants import (SCREEN_WIDTH, SCREEN_HEIGHT, FPS, MAX_FRAME_TIME, ATLAS_PATH, ATLAS_DIR, SPRITE_DIR,
+                           BACKGROUND_IMAGE, PLAYING, PAUSED, GAME_OVER)
+
+MAX_PARTICLES = 10000
+# Set to a .csv or .json path to record per-phase frame times for the whole session
+PROFILE_PATH = os.environ.get('SPACE_FIGHTER_PROFILE')
+# Set to anything to count allocations per frame in bytes with tracemalloc (slow) instead of blocks
+TRACE_ALLOCATIONS = bool(os.environ.get('SPACE_FIGHTER_TRACE_ALLOC'))
+
+# Sprites packed by `python -m src.atlas` are regions of one sheet texture. With the asset
+# bundle (`python -m src.build_bundle`), the sheet and the background are uploaded straight
+# from its memory-mapped pixels instead of being decoded from PNGs. Anything else loads from
+# its own file.
+BUNDLE = AssetBundle.open()
+ATLAS_REGIONS = {}  # sprite path -> (sheet path, Kivy-style [x, y, w, h])
+if BUNDLE:
+    atlas = BUNDLE.atlas
+elif os.path.exists(ATLAS_PATH):
+    with open(ATLAS_PATH) as f:
+        atlas = [(os.path.join(ATLAS_DIR, sheet_name), regions) for sheet_name, regions in json.load(f).items()]
+else:
+    atlas = []
+for sheet_path, regions in atlas:
+    for name, region in regions.items():
+        ATLAS_REGIONS[os.path.join(SPRITE_DIR, name + '.png')] = (sheet_path, region)
+TEXTURES = {}  # path -> Texture, made the first time it is drawn
+
+def bundle_texture(path):
+    pixels, size, pixel_format = BUNDLE.pixels(path)
+    colorfmt = pixel_format.lower()
+    texture = Texture.create(size=size, colorfmt='rgba' if 'a' in colorfmt else 'rgb')
+
+    def upload(texture):
+        texture.blit_buffer(pixels, colorfmt=colorfmt, bufferfmt='ubyte')
+
+    upload(texture)
+    texture.add_reload_observer(upload)  # A lost GL context (Android resume) takes the pixels with it
+    texture.flip_vertical()  # The rows run from the top, and Kivy's textures from the bottom
+    return texture
+
+def sprite_texture(path):
+    texture = TEXTURES.get(path)
+    if texture is None:
+        if path in ATLAS_REGIONS:
+            sheet_path, (x, y, w, h) = ATLAS_REGIONS[path]
+            texture = sprite_texture(sheet_path).get_region(x, y, w, h)
+        elif BUNDLE and path in BUNDLE:
+            texture = bundle_texture(path)
+        else:
+            texture = CoreImage(path).texture
+        TEXTURES[path] = texture
+    return texture
+
+def screen_pos(entity, alpha):
+    # Interpolated position in Kivy's coordinates: the simulation's y axis points down
+    x = entity.prev_x + (entity.x - entity.prev_x) * alpha
+    y = entity.prev_y + (entity.y - entity.prev_y) * alpha
+    return (x, SCREEN_HEIGHT - y - entity.height)
+
+class Player(Widget):
+    # Draws Simulation.player; the state itself lives in the simulation
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.size = (100, 100)
-        self.base_speed = 10
-        self.speed = self.base_speed
-        self.shield = False
-        self.power_up_level = 0
-        self.speed_boost_timer = 0
-        self.rapid_fire_timer = 0
-        self.velocity_x = 0
-        self.velocity_y = 0
-        self.acceleration = 1
-        self.max_speed = 15
-        self.deceleration = 0.9
+        self.size = PLAYER_SIZE
         
         with self.canvas:
             self.player_color = Color(1, 1, 1, 1)
-            self.player_image = Rectangle(source='assets/spaceArt/png/player.png', pos=self.pos, size=self.size)
+            self.player_image = Rectangle(texture=sprite_texture('assets/spaceArt/png/player.png'), pos=self.pos, size=self.size)
             self.shield_color = Color(0, 0, 1, 0)
-            self.shield_image = Rectangle(source='assets/spaceArt/png/shield.png', pos=self.pos, size=(120, 120))
+            self.shield_image = Rectangle(texture=sprite_texture('assets/spaceArt/png/shield.png'), pos=self.pos, size=(120, 120))
         
         self.bind(pos=self.update_rect_pos)
 
@@ -46,142 +99,300 @@ class Player(GameObject):
         self.player_image.pos = self.pos
         self.shield_image.pos = (self.x - 10, self.y - 10)
 
-    def update(self, dt):
-        self.x += self.velocity_x
-        self.y += self.velocity_y
-        
-        # Apply deceleration
-        self.velocity_x *= self.deceleration
-        self.velocity_y *= self.deceleration
-        
-        if self.speed_boost_timer > 0:
-            self.speed_boost_timer -= dt
-            if self.speed_boost_timer <= 0:
-                self.speed = self.base_speed
-        if self.rapid_fire_timer > 0:
-            self.rapid_fire_timer -= dt
-            if self.rapid_fire_timer <= 0:
-                self.power_up_level = max(0, self.power_up_level - 1)
-        self.shield_color.a = 1 if self.shield else 0
-
-class Enemy(GameObject):
-    def __init__(self, is_ufo=False, **kwargs):
-        super().__init__(**kwargs)
-        self.size = (60, 80)
-        self.speed = 2
-        image_path = 'assets/spaceArt/png/enemyUFO.png' if is_ufo else 'assets/spaceArt/png/enemyShip.png'
-        with self.canvas:
-            self.enemy_image = Rectangle(source=image_path, pos=self.pos, size=self.size)
-
-    def move(self):
-        self.y -= self.speed
-        self.enemy_image.pos = self.pos
-
-class Bullet(GameObject):
-    def __init__(self, angle=0, is_enemy=False, **kwargs):
-        super().__init__(**kwargs)
-        self.size = (5, 10)
-        self.speed = 7
-        self.angle = angle
-        image_path = 'assets/spaceArt/png/laserRed.png' if is_enemy else 'assets/spaceArt/png/laserGreen.png'
-        with self.canvas:
-            self.bullet_image = Rectangle(source=image_path, pos=self.pos, size=self.size)
-
-    def move(self):
-        self.x += self.speed * math.sin(math.radians(self.angle))
-        self.y += self.speed * math.cos(math.radians(self.angle))
-        self.bullet_image.pos = self.pos
-
-class PowerUp(GameObject):
-    def __init__(self, power_up_type, **kwargs):
-        super().__init__(**kwargs)
-        self.size = (20, 20)
-        self.speed = 2
-        self.type = power_up_type
-        power_up_images = {
-            0: 'assets/spaceArt/png/shield.png',
-            1: 'assets/spaceArt/png/laserGreenShot.png',
-            2: 'assets/spaceArt/png/meteorSmall.png',
-            3: 'assets/spaceArt/png/life.png'
-        }
-        with self.canvas:
-            self.power_up_image = Rectangle(source=power_up_images[self.type], pos=self.pos, size=self.size)
+    def sync(self, player, alpha):
+        self.pos = screen_pos(player, alpha)
+        self.shield_color.a = 1 if player.shield else 0
+
+# Image for each entity variant: enemy ship/UFO, bullet angle, power-up type
+ENEMY_IMAGES = [
+    'assets/spaceArt/png/enemyShip.png',
+    'assets/spaceArt/png/enemyUFO.png',
+]
+
+BULLET_IMAGES = {angle: 'assets/spaceArt/png/laserGreen.png' for angles in BULLET_ANGLES for angle in angles}
+
+POWER_UP_IMAGES = {
+    0: 'assets/spaceArt/png/shield.png',
+    1: 'assets/spaceArt/png/laserGreenShot.png',
+    2: 'assets/spaceArt/png/meteorSmall.png',
+    3: 'assets/spaceArt/png/life.png'
+}
+
+# Index buffer for the quad meshes: two triangles per quad, sized for Kivy's 16-bit indices
+MAX_MESH_QUADS = 65536 // 4
+QUAD_INDICES = [i * 4 + corner for i in range(MAX_MESH_QUADS) for corner in (0, 1, 2, 0, 2, 3)]
+
+def quad_vertices(x, y, width, height, tex_coords=None, angles=None):
+    # Four (x, y, u, v) vertices per quad, counter-clockwise from bottom-left, flattened for Mesh.
+    # With angles (degrees), each quad is turned counter-clockwise about its centre, the way
+    # pygame.transform.rotate turns the pygame build's sprites.
+    quads = np.zeros((len(x), 4, 4), dtype=np.float32)
+    quads[:, (0, 3), 0] = x[:, None]
+    quads[:, (1, 2), 0] = (x + width)[:, None]
+    quads[:, (0, 1), 1] = y[:, None]
+    quads[:, (2, 3), 1] = (y + height)[:, None]
+    if angles is not None:
+        cx, cy = (x + width / 2)[:, None], (y + height / 2)[:, None]
+        radians = np.radians(angles)[:, None]
+        cos, sin = np.cos(radians), np.sin(radians)
+        dx, dy = quads[:, :, 0] - cx, quads[:, :, 1] - cy
+        quads[:, :, 0] = cx + dx * cos - dy * sin
+        quads[:, :, 1] = cy + dx * sin + dy * cos
+    if tex_coords is not None:
+        quads[:, :, 2:] = tex_coords.reshape(-1, 4, 2)
+    return quads.ravel().tolist()
+
+class ParticleLayer:
+    # Draws every live particle of one color with a single Mesh instead of a widget per spark
+    def __init__(self, canvas, particles):
+        self.particles = particles
+        self.meshes = []
+        with canvas:
+            for color in particles.palette:
+                Color(*color)
+                self.meshes.append(Mesh(mode='triangles'))
 
-    def move(self):
-        self.y -= self.speed
-        self.power_up_image.pos = self.pos
-
-class Particle(Widget):
-    def __init__(self, x, y, color, **kwargs):
+    def update(self):
+        particles = self.particles
+        visible = particles.visible(min_size=0)
+        for color_index, mesh in enumerate(self.meshes):
+            slots = visible[particles.color[visible] == color_index][:MAX_MESH_QUADS]
+            size = particles.size[slots]
+            mesh.vertices = quad_vertices(particles.x[slots], particles.y[slots], size, size)
+            mesh.indices = QUAD_INDICES[:len(slots) * 6]
+
+class EntityRenderer:
+    # Draws every entity with one Mesh per GL texture. With the sprite atlas that is a single
+    # Mesh for all enemies, bullets and power-ups, rebuilt once per frame.
+    def __init__(self, canvas):
+        self.group = InstructionGroup()
+        self.group.add(Color(1, 1, 1, 1))
+        canvas.add(self.group)
+        self.meshes = {}  # texture id -> Mesh
+        self.sprites = {}  # source -> (texture id, tex_coords)
+
+    def sprite(self, source):
+        sprite = self.sprites.get(source)
+        if sprite is None:
+            texture = sprite_texture(source)
+            # Atlas regions all bind their sheet's GL texture, so they can share a Mesh
+            if texture.id not in self.meshes:
+                mesh = Mesh(mode='triangles', texture=texture)
+                self.group.add(mesh)
+                self.meshes[texture.id] = mesh
+            sprite = self.sprites[source] = (texture.id, texture.tex_coords)
+        return sprite
+
+    def update(self, alpha=1.0, *layers):
+        # layers are (EntityArray, images) pairs, images mapping a row's variant to its source.
+        # A layer can add a sprite size, (EntityArray, images, size): its sprites are then drawn
+        # at that size, centred on each hitbox and turned by the variant in degrees, which is
+        # how bullets carry their firing angle.
+        batches = {texture_id: [] for texture_id in self.meshes}
+        for entities, images, *size in layers:
+            n = entities.count
+            x, y = entities.lerp(alpha)
+            width, height, variants = entities.width[:n], entities.height[:n], entities.variant[:n]
+            rows = np.zeros((n, 13), dtype=np.float32)
+            rows[:, 0] = x
+            rows[:, 1] = SCREEN_HEIGHT - y - height  # The simulation's y axis points down
+            rows[:, 2] = width
+            rows[:, 3] = height
+            if size:
+                # The hitbox is the rotated sprite's bounding box; draw the sprite itself in it
+                sprite_width, sprite_height = size[0]
+                rows[:, 0] += (width - sprite_width) / 2
+                rows[:, 1] += (height - sprite_height) / 2
+                rows[:, 2] = sprite_width
+                rows[:, 3] = sprite_height
+                rows[:, 12] = variants
+            for variant in np.unique(variants).tolist():
+                texture_id, tex_coords = self.sprite(images[variant])
+                selected = variants == variant
+                rows[selected, 4:12] = tex_coords
+                batches.setdefault(texture_id, []).append(rows[selected])
+        for texture_id, parts in batches.items():
+            rows = np.concatenate(parts)[:MAX_MESH_QUADS] if parts else np.empty((0, 13), dtype=np.float32)
+            mesh = self.meshes[texture_id]
+            angles = rows[:, 12] if rows[:, 12].any() else None
+            mesh.vertices = quad_vertices(rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3], rows[:, 4:12], angles)
+            mesh.indices = QUAD_INDICES[:len(rows) * 6]
+
+    def clear(self):
+        self.update()
+
+class KivyAudio:
+    # AudioManager backend. A Kivy Sound plays one instance at a time, so each effect is loaded
+    # once per voice it may use. With the SDL2 audio provider a Sound is decoded to PCM when it
+    # loads, so playing one doesn't decode anything.
+    def __init__(self, voices):
+        self.voices = [None] * voices  # Sound last started on each voice
+
+    def load(self, path, copies):
+        sounds = [SoundLoader.load(path) for _ in range(copies)]
+        return [sound for sound in sounds if sound] or None
+
+    def play(self, voice, sounds):
+        self.stop(voice)
+        for sound in sounds:
+            if sound.state == 'stop':
+                break
+        else:
+            sound = sounds[0]
+            sound.stop()
+        sound.play()
+        self.voices[voice] = sound
+
+    def busy(self, voice):
+        sound = self.voices[voice]
+        return sound is not None and sound.state == 'play'
+
+    def stop(self, voice):
+        if self.voices[voice] is not None:
+            self.voices[voice].stop()
+
+class NumberLabel(Widget):
+    # '<prefix><number>' put together from textures rasterized once per string and digit, so
+    # a new value only swaps Rectangle textures instead of re-rendering a Label
+    def __init__(self, prefix, font_size='15sp', **kwargs):
         super().__init__(**kwargs)
-        self.pos = (x, y)
-        self.color = color
-        self.dx = random.uniform(-1, 1)
-        self.dy = random.uniform(-1, 1)
-        self.initial_size = 5
-        self.size = (self.initial_size, self.initial_size)
+        self.font_size = font_size
+        self.textures = {}
+        self.value = None
+        prefix_texture = self.texture(prefix)
         with self.canvas:
-            Color(*color)
-            self.particle = Rectangle(pos=self.pos, size=self.size)
-
-    def update(self):
-        self.x += self.dx
-        self.y += self.dy
-        self.initial_size -= 0.1
-        if self.initial_size <= 0:
-            return True
-        new_size = (self.initial_size, self.initial_size)
-        self.size = new_size
-        self.particle.pos = (self.x, self.y)
-        self.particle.size = new_size
-        return False
+            Color(1, 1, 1, 1)
+            self.prefix_rect = Rectangle(texture=prefix_texture, size=prefix_texture.size, pos=self.pos)
+        self.digit_rects = []
+
+    def texture(self, text):
+        texture = self.textures.get(text)
+        if texture is None:
+            label = CoreLabel(text=text, font_size=self.font_size)
+            label.refresh()
+            texture = self.textures[text] = label.texture
+        return texture
+
+    def set_value(self, value):
+        if value == self.value:
+            return
+        self.value = value
+        digits = str(value)
+        x = self.x + self.prefix_rect.size[0]
+        for index, digit in enumerate(digits):
+            if index == len(self.digit_rects):
+                with self.canvas:
+                    self.digit_rects.append(Rectangle())
+            texture = self.texture(digit)
+            rect = self.digit_rects[index]
+            rect.texture = texture
+            rect.size = texture.size
+            rect.pos = (x, self.y)
+            x += texture.width
+        for rect in self.digit_rects[len(digits):]:
+            rect.size = (0, 0)  # Spare digits from a longer earlier value
 
 class GameOverScreen(BoxLayout):
-    def __init__(self, score, restart_callback, **kwargs):
+    # Built once and shown over the game each time it ends
+    def __init__(self, restart_callback, **kwargs):
         super().__init__(**kwargs)
         self.orientation = 'vertical'
         self.add_widget(Label(text='Game Over', font_size='40sp'))
-        self.add_widget(Label(text=f'Score: {score}', font_size='30sp'))
+        self.score_label = Label(text='Score: 0', font_size='30sp')
+        self.add_widget(self.score_label)
         restart_button = Button(text='Restart', on_press=restart_callback)
         quit_button = Button(text='Quit', on_press=lambda x: App.get_running_app().stop())
         self.add_widget(restart_button)
         self.add_widget(quit_button)
 
+    def set_score(self, score):
+        self.score_label.text = f'Score: {score}'
+
 class SpaceFighterGame(Widget):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.player = Player(pos=(Window.width/2 - 50, 100))
+        self.started = time.perf_counter()  # Startup times in profiler.metrics count from here
+        self.profiler = FrameProfiler(enabled=PROFILE_PATH is not None)
+        # The rules live in the simulation; this widget reads input, plays its events and draws it
+        self.sim = Simulation(profiler=self.profiler)
+        self.lag = 0.0  # Seconds of wall-clock time not yet simulated
+        self.keys = set()  # Keys currently held down
+        self.player = Player()
+        self.player.sync(self.sim.player, 1.0)
         self.add_widget(self.player)
-        self.enemies = []
-        self.bullets = []
-        self.power_ups = []
-        self.particles = []
-        self.score = 0
-        self.score_label = Label(text=f"Score: {self.score}", pos=(10, Window.height - 30))
+        self.particles = ParticleSystem(MAX_PARTICLES, [(1, 0.5, 0)])
+        self.particle_layer = ParticleLayer(self.canvas.after, self.particles)
+        self.score_label = NumberLabel('Score: ', pos=(10, Window.height - 30))
+        self.score_label.set_value(0)
         self.add_widget(self.score_label)
-
-        self.shoot_sound = SoundLoader.load('assets/sounds/shoot.mp3')
-        self.explosion_sound = SoundLoader.load('assets/sounds/explosion.mp3')
-        self.power_up_sound = SoundLoader.load('assets/sounds/powerup.mp3')
-        self.background_music = SoundLoader.load('assets/sounds/background.mp3')
-        if self.background_music:
-            self.background_music.loop = True
-            self.background_music.play()
+        self.profiler_label = Label(font_name='RobotoMono-Regular', font_size='12sp', halign='left',
+                                    valign='top', opacity=0, pos=(10, Window.height - 370), size=(360, 320),
+                                    text_size=(360, 320))
+        self.add_widget(self.profiler_label)
+        self.pause_label = Label(text='Paused\nPress P or tap to resume', font_size='30sp', halign='center',
+                                 opacity=0, pos=(0, 0), size=Window.size)
+        self.add_widget(self.pause_label)
+        # One update loop runs every scene; a restart resets the game in place and reuses the
+        # widgets, textures, sounds and the game over screen
+        self.state = PLAYING
+        self.game_over_screen = GameOverScreen(self.restart_game, size=Window.size)
+
+        # Critical sounds load now; the other effects and the music stream in on a background
+        # thread after the first frame, as in the pygame build
+        self.audio = AudioManager(KivyAudio(VOICES), preload=False)
+        self.background_music = None
+        self.assets = AssetLoader(MANIFEST,
+                                  {'sound': self.load_sound, 'music': self.load_music},
+                                  {'sound': self.audio.attach, 'music': self.start_music})
+        self.assets.load_critical()
+        # Kivy renders outside update(), so the governor watches the interval between frames
+        # instead: a tier is dropped when frames come 20% late and regained when they're on time
+        self.quality = QualityGovernor(budget_ms=1200 / FPS, recover_ms=1050 / FPS)
+        self.tier = self.quality.tier
 
         with self.canvas.before:
-            self.background = Rectangle(source='assets/spaceArt/png/Background/starBackground.png', pos=(0, 0), size=Window.size)
+            self.background = Rectangle(texture=sprite_texture(BACKGROUND_IMAGE), pos=(0, 0), size=Window.size)
+        # Entities draw above the background and below the player and labels
+        self.entity_renderer = EntityRenderer(self.canvas.before)
+
+        # The garbage collector only runs between updates and at scene changes, and everything
+        # loaded so far is frozen out of its scans
+        self.gc = GCControl(self.profiler, trace=TRACE_ALLOCATIONS)
+        self.gc.freeze()
+        self.gc.start()
 
         Clock.schedule_interval(self.update, 1.0/FPS)
-        Clock.schedule_interval(self.spawn_enemy, 2)
-        Clock.schedule_interval(self.spawn_power_up, 10)
 
         self._keyboard = Window.request_keyboard(self._keyboard_closed, self)
         self._keyboard.bind(on_key_down=self._on_keyboard_down)
         self._keyboard.bind(on_key_up=self._on_keyboard_up)
 
-        self.shoot_timer = 0
-        self.shoot_delay = 0.2  # 200ms between shots
-        self.spacebar_held = False
+    def load_sound(self, name, path):
+        return self.audio.backend.load(path, self.audio.effects[name].max_voices)
+
+    def load_music(self, name, path):
+        music = SoundLoader.load(path)
+        if music is None:
+            raise IOError(f'no audio provider could open {path}')
+        return music
+
+    def start_music(self, name, music):
+        self.background_music = music
+        music.loop = True
+        if self.state != PAUSED:
+            music.play()
+
+    def poll_assets(self):
+        # Called after each frame until every asset is in; see Game.poll_assets
+        metrics = self.profiler.metrics
+        if 'first_frame' not in metrics:
+            metrics['first_frame'] = 1000 * (time.perf_counter() - self.started)
+            self.assets.start()
+        elif self.assets.poll():
+            self.gc.freeze()
+            metrics['assets_loaded'] = 1000 * (time.perf_counter() - self.started)
+            print(f"Startup: first frame in {metrics['first_frame']:.0f} ms, "
+                  f"all assets in {metrics['assets_loaded']:.0f} ms")
 
     def _keyboard_closed(self):
         self._keyboard.unbind(on_key_down=self._on_keyboard_down)
@@ -189,168 +400,146 @@ class SpaceFighterGame(Widget):
         self._keyboard = None
 
     def _on_keyboard_down(self, keyboard, keycode, text, modifiers):
-        if keycode[1] == 'left':
-            self.player.velocity_x = max(self.player.velocity_x - self.player.acceleration, -self.player.max_speed)
-        elif keycode[1] == 'right':
-            self.player.velocity_x = min(self.player.velocity_x + self.player.acceleration, self.player.max_speed)
-        elif keycode[1] == 'up':
-            self.player.velocity_y = min(self.player.velocity_y + self.player.acceleration, self.player.max_speed)
-        elif keycode[1] == 'down':
-            self.player.velocity_y = max(self.player.velocity_y - self.player.acceleration, -self.player.max_speed)
-        elif keycode[1] == 'spacebar':
-            self.spacebar_held = True
-        return True
-
-    def _on_keyboard_up(self, keyboard, keycode):
-        if keycode[1] in ('left', 'right'):
-            self.player.velocity_x = 0
-        elif keycode[1] in ('up', 'down'):
-            self.player.velocity_y = 0
-        elif keycode[1] == 'spacebar':
-            self.spacebar_held = False
+        key = keycode[1]
+        if key == 'f3':
+            self.toggle_profiler()
+        elif self.state == GAME_OVER:
+            if key == 'r':
+                self.restart_game()
+            elif key == 'q':
+                App.get_running_app().stop()
+        elif key == 'p':
+            self.set_state(PLAYING if self.state == PAUSED else PAUSED)
+        else:
+            self.keys.add(key)
         return True
 
-    def shoot(self):
-        angles = self.get_bullet_angles()
-        for angle in angles:
-            bullet = Bullet(angle=angle, pos=(self.player.center_x, self.player.top))
-            self.bullets.append(bullet)
-            self.add_widget(bullet)
-        if self.shoot_sound:
-            self.shoot_sound.play()
-
-    def get_bullet_angles(self):
-        if self.player.power_up_level == 0:
-            return [0]
-        elif self.player.power_up_level == 1:
-            return [-15, 0, 15]
-        elif self.player.power_up_level == 2:
-            return [-30, -15, 0, 15, 30]
-        else:
-            return [-45, -30, -15, 0, 15, 30, 45]
+    def on_touch_down(self, touch):
+        if self.state == PAUSED:
+            self.set_state(PLAYING)
+            return True
+        return super().on_touch_down(touch)
+
+    def set_state(self, state):
+        if state == PAUSED:
+            self.keys.clear()  # Key-ups are missed while the window is away
+            if self.background_music:
+                self.background_music.stop()
+        elif self.state == PAUSED and self.background_music:
+            self.background_music.play()
+        self.pause_label.opacity = 1 if state == PAUSED else 0
+        self.state = state
+        if state != PLAYING:
+            self.gc.collect()  # Nobody is playing, so nobody sees the pause
 
-    def spawn_enemy(self, dt):
-        is_ufo = random.random() < 0.2
-        enemy = Enemy(is_ufo=is_ufo, pos=(random.randint(0, Window.width - 60), Window.height))
-        self.enemies.append(enemy)
-        self.add_widget(enemy)
+    def toggle_profiler(self):
+        show = not self.profiler_label.opacity
+        self.profiler_label.opacity = 1 if show else 0
+        # Keep recording after the overlay closes only if the session is being exported
+        self.profiler.set_enabled(show or PROFILE_PATH is not None)
 
-    def spawn_power_up(self, dt):
-        if len(self.power_ups) < 3:
-            power_up = PowerUp(random.randint(0, 3), pos=(random.randint(0, Window.width - 20), Window.height))
-            self.power_ups.append(power_up)
-            self.add_widget(power_up)
+    def _on_keyboard_up(self, keyboard, keycode):
+        self.keys.discard(keycode[1])
+        return True
 
     def update(self, dt):
-        self.player.update(dt)
-        
-        # Handle continuous shooting
-        self.shoot_timer += dt
-        if self.spacebar_held and self.shoot_timer >= self.shoot_delay:
-            self.shoot()
-            self.shoot_timer = 0
-        
-        # Keep player within screen bounds
-        self.player.x = max(0, min(self.player.x, Window.width - self.player.width))
-        self.player.y = max(0, min(self.player.y, Window.height - self.player.height))
-
-        for enemy in self.enemies[:]:
-            enemy.move()
-            if enemy.top < 0:
-                self.remove_widget(enemy)
-                self.enemies.remove(enemy)
-
-        for bullet in self.bullets[:]:
-            bullet.move()
-            if bullet.y > Window.height:
-                self.remove_widget(bullet)
-                self.bullets.remove(bullet)
-
-        for power_up in self.power_ups[:]:
-            power_up.move()
-            if power_up.top < 0:
-                self.remove_widget(power_up)
-                self.power_ups.remove(power_up)
-
-        for particle in self.particles[:]:
-            if particle.update():
-                self.remove_widget(particle)
-                self.particles.remove(particle)
-
-        self.check_collisions()
-
-    def check_collisions(self):
-        for enemy in self.enemies[:]:
-            for bullet in self.bullets[:]:
-                if self.check_collision(enemy, bullet):
-                    self.remove_widget(enemy)
-                    self.enemies.remove(enemy)
-                    self.remove_widget(bullet)
-                    self.bullets.remove(bullet)
-                    self.score += 1
-                    self.score_label.text = f"Score: {self.score}"
-                    self.create_explosion(enemy.center)
-                    if self.explosion_sound:
-                        self.explosion_sound.play()
-                    break
-
-            if self.check_collision(self.player, enemy):
-                if self.player.shield:
-                    self.player.shield = False
-                    self.remove_widget(enemy)
-                    self.enemies.remove(enemy)
-                    self.create_explosion(enemy.center)
-                    if self.explosion_sound:
-                        self.explosion_sound.play()
-                else:
-                    self.game_over()
-
-        for power_up in self.power_ups[:]:
-            if self.check_collision(self.player, power_up):
-                self.apply_power_up(power_up.type)
-                self.remove_widget(power_up)
-                self.power_ups.remove(power_up)
-                if self.power_up_sound:
-                    self.power_up_sound.play()
-
-    def check_collision(self, obj1, obj2):
-        return obj1.collide_widget(obj2)
-
-    def apply_power_up(self, power_up_type):
-        if power_up_type == 0:  # Shield
-            self.player.shield = True
-        elif power_up_type == 1:  # Rapid Fire
-            self.player.power_up_level = min(self.player.power_up_level + 1, 3)
-            self.player.rapid_fire_timer = 10  # 10 seconds
-        elif power_up_type == 2:  # Bomb
-            for enemy in self.enemies[:]:
-                self.remove_widget(enemy)
-                self.create_explosion(enemy.center)
-            self.enemies = []
-        elif power_up_type == 3:  # Speed Boost
-            self.player.speed = 8
-            self.player.speed_boost_timer = 5  # 5 seconds
+        if self.state != PLAYING:
+            # Paused or over: no time is owed to the simulation, and self.lag keeps the fraction
+            # of a tick the picture was frozen at, so resuming carries on from that frame
+            self.gc.idle()  # Automatic collection is still off, and Kivy keeps allocating
+            return
+        profiler = self.profiler
+        profiler.begin_frame()
+        self.gc.begin_frame()
+        if self.quality.record(dt * 1000, time.perf_counter() - self.started):
+            self.tier = self.quality.tier
+            self.audio.interval_scale = self.tier.sound_interval
+        keys = self.keys
+        controls = (('right' in keys) - ('left' in keys), ('down' in keys) - ('up' in keys), 'spacebar' in keys)
+
+        # Same fixed tick as the pygame build, interpolating the leftover fraction when drawing
+        self.lag += min(dt, MAX_FRAME_TIME / 1000)
+        alive = True
+        while alive and self.lag >= self.sim.dt:
+            alive = self.sim.step(*controls)
+            self.play_events()
+            self.lag -= self.sim.dt
+
+        with profiler.phase('particles'):
+            self.particles.update(dt)
+            self.particle_layer.update()
+
+        with profiler.phase('render'):
+            alpha = self.lag / self.sim.dt
+            self.player.sync(self.sim.player, alpha)
+            self.entity_renderer.update(alpha, (self.sim.enemies, ENEMY_IMAGES), (self.sim.bullets, BULLET_IMAGES, BULLET_SIZE),
+                                        (self.sim.power_ups, POWER_UP_IMAGES))
+            self.score_label.set_value(self.sim.score)
+        if not self.assets.done:
+            self.poll_assets()
+        self.gc.end_frame()
+        profiler.end_frame()
+
+        # Refreshing the overlay re-rasterizes its label, so only do it a few times a second
+        if self.profiler_label.opacity and profiler.frame % 15 == 0:
+            self.profiler_label.text = '\n'.join(profiler.report_lines() + [f'quality        {self.tier.name}'] +
+                                                  self.gc.report_lines() + self.sim.entity_report_lines())
+
+        if not alive:
+            self.game_over()
+
+    def play_events(self):
+        for kind, x, y in self.sim.events:
+            if kind == EXPLOSION:
+                self.create_explosion((x, SCREEN_HEIGHT - y))
+            self.audio.play(kind)
 
     def create_explosion(self, pos):
-        for _ in range(20):
-            particle = Particle(pos[0], pos[1], (1, 0.5, 0))
-            self.particles.append(particle)
-            self.add_widget(particle)
+        tier = self.tier
+        self.particles.emit(pos[0], pos[1], max(1, round(20 * tier.particles)), (5, 5), speed=60,
+                            lifetime_range=(0.8 * tier.lifetime, 0.8 * tier.lifetime))
 
     def game_over(self):
-        self.clear_widgets()
-        game_over_screen = GameOverScreen(self.score, self.restart_game)
-        self.add_widget(game_over_screen)
+        self.set_state(GAME_OVER)
+        self.player.opacity = 0
+        self.score_label.opacity = 0
+        self.entity_renderer.clear()
+        self.particles.clear()
+        self.particle_layer.update()
+        self.game_over_screen.set_score(self.sim.score)
+        self.add_widget(self.game_over_screen)
 
     def restart_game(self, *args):
-        App.get_running_app().stop()
-        App.get_running_app().run()
+        self.remove_widget(self.game_over_screen)
+        self.sim.reset()
+        self.lag = 0.0
+        self.keys.clear()
+        self.player.sync(self.sim.player, 1.0)
+        self.player.opacity = 1
+        self.score_label.opacity = 1
+        if self.background_music:
+            self.background_music.stop()
+            self.background_music.play()  # Restart the music
+        self.set_state(PLAYING)
 
 class SpaceFighterApp(App):
     def build(self):
-        game = SpaceFighterGame()
+        self.game = SpaceFighterGame()
         Window.size = (SCREEN_WIDTH, SCREEN_HEIGHT)
-        return game
+        return self.game
+
+    def on_pause(self):
+        # Sent to the background (Android): stop the clock and the music, keep the game
+        if self.game.state == PLAYING:
+            self.game.set_state(PAUSED)
+        return True
+
+    def on_stop(self):
+        self.game.gc.stop()
+        if PROFILE_PATH:
+            game = self.game
+            game.profiler.dump(PROFILE_PATH, {'entities': game.sim.entity_stats(), 'audio': game.audio.stats(),
+                                              'quality': game.quality.stats(), 'gc': game.gc.stats()})
 
 if __name__ == '__main__':
     SpaceFighterApp().run()
\ No newline at end of file
@@ -0,0 +1,110 @@
+import os
+import pygame
+from collections import OrderedDict
+from src.atlas import load_index
+
+def display_alpha_masks():
+    # Channel masks of surfaces made by convert_alpha(): the display's colour masks plus alpha
+    red, green, blue, _ = pygame.display.get_surface().get_masks()
+    return (red, green, blue, 0xff000000 & ~(red | green | blue))
+
+class SpriteCache:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._images = OrderedDict()  # (path, size, angle, alpha) -> Surface, oldest first
+        self._masks = {}  # (path, size, angle) -> pygame.mask.Mask; small, so never evicted
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.loads = 0  # Number of times a file was actually decoded from disk
+        self.atlas_regions = {}  # sprite path -> (sheet path, Kivy-style [x, y, w, h])
+        self.bundle = None
+
+    def use_atlas(self, atlas_path, sprite_dir):
+        # Serve sprites that were packed into the atlas as subsurfaces of its sheet, so the
+        # whole set costs one decode. Paths not in the atlas still load from their own file.
+        self.add_regions(load_index(atlas_path), sprite_dir)
+
+    def use_bundle(self, bundle, sprite_dir):
+        # Take the atlas and every image the asset bundle (src/bundle.py) holds from its memory
+        # map instead of decoding files. Anything not in the bundle still loads from its file.
+        self.bundle = bundle
+        self.add_regions(bundle.atlas, sprite_dir)
+
+    def add_regions(self, index, sprite_dir):
+        for sheet_path, regions in index:
+            for name, region in regions.items():
+                self.atlas_regions[os.path.join(sprite_dir, name + '.png')] = (sheet_path, region)
+
+    def get(self, path, size=None, angle=0, alpha=True):
+        return self._lookup((path, size, angle, alpha), lambda: self._build(path, size, angle, alpha))
+
+    def mask(self, path, size=None, angle=0):
+        # Solid pixels (alpha over half) of the image get() returns for the same arguments
+        key = (path, size, angle)
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = self._masks[key] = pygame.mask.from_surface(self.get(path, size, angle))
+        return mask
+
+    def circle(self, color, radius):
+        # Filled circles are generated rather than loaded, but share the same LRU and stats
+        return self._lookup(('circle', color, radius, True), lambda: self._build_circle(color, radius))
+
+    def _lookup(self, key, build):
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+            self.hits += 1
+            return image
+
+        self.misses += 1
+        image = build()
+        self._images[key] = image
+        if len(self._images) > self.max_entries:
+            self._images.popitem(last=False)
+            self.evictions += 1
+        return image
+
+    def _build(self, path, size, angle, alpha):
+        if angle:
+            # Rotate from the scaled image so every angle shares one scale pass
+            return pygame.transform.rotate(self.get(path, size, 0, alpha), angle)
+        if size is not None:
+            return pygame.transform.scale(self.get(path, None, 0, alpha), size)
+        if path in self.atlas_regions:
+            sheet_path, (x, y, w, h) = self.atlas_regions[path]
+            sheet = self.get(sheet_path)
+            image = sheet.subsurface((x, sheet.get_height() - y - h, w, h))
+            return image if alpha else image.convert()
+        if self.bundle is not None and path in self.bundle:
+            image = pygame.image.frombuffer(*self.bundle.pixels(path))
+            # Bundled pixels with alpha are already laid out the way convert_alpha() would leave
+            # them, so the surface can keep pointing into the map rather than being copied
+            if alpha and image.get_masks() == display_alpha_masks():
+                return image
+        else:
+            image = pygame.image.load(path)
+            self.loads += 1
+        return image.convert_alpha() if alpha else image.convert()
+
+    def _build_circle(self, color, radius):
+        image = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        pygame.draw.circle(image, color, (radius, radius), radius)
+        return image
+
+    def stats(self):
+        return {
+            'entries': len(self._images),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'loads': self.loads,
+        }
+
+    def clear(self):
+        self._images.clear()
+        self._masks.clear()
+
+# Shared by every game object in the process
+sprite_cache = SpriteCache()
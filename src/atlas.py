@@ -0,0 +1,70 @@
+import argparse
+import glob
+import json
+import os
+import pygame
+from src.constants import SPRITE_DIR, ATLAS_DIR, ATLAS_NAME, ATLAS_PATH
+
+PADDING = 2  # Transparent gap between sprites so filtering never samples a neighbour
+
+def pack(sizes, width):
+    # Shelf packing, tallest first. Returns {name: (x, y)} with y from the top, and the used height.
+    positions = {}
+    x = y = shelf_height = 0
+    for name, (w, h) in sorted(sizes.items(), key=lambda item: (-item[1][1], item[0])):
+        if x + w > width:
+            x, y = 0, y + shelf_height + PADDING
+            shelf_height = 0
+        positions[name] = (x, y)
+        x += w + PADDING
+        shelf_height = max(shelf_height, h)
+    return positions, y + shelf_height
+
+def build(sprite_dir=SPRITE_DIR, atlas_dir=ATLAS_DIR, name=ATLAS_NAME):
+    images = {os.path.splitext(os.path.basename(path))[0]: pygame.image.load(path)
+              for path in sorted(glob.glob(os.path.join(sprite_dir, '*.png')))}
+    sizes = {key: image.get_size() for key, image in images.items()}
+
+    # Smallest power-of-two square (or half-height rectangle) sheet the shelves fit in
+    width = 64
+    while True:
+        positions, used_height = pack(sizes, width)
+        if max(w for w, _ in sizes.values()) <= width and used_height <= width:
+            break
+        width *= 2
+    height = width // 2 if used_height <= width // 2 else width
+
+    sheet = pygame.Surface((width, height), pygame.SRCALPHA)
+    sheet.fill((0, 0, 0, 0))
+    regions = {}
+    for key, (x, y) in positions.items():
+        sheet.blit(images[key], (x, y))
+        w, h = sizes[key]
+        # Kivy atlas coordinates start at the bottom-left of the sheet
+        regions[key] = [x, height - y - h, w, h]
+
+    os.makedirs(atlas_dir, exist_ok=True)
+    sheet_name = f'{name}-0.png'
+    pygame.image.save(sheet, os.path.join(atlas_dir, sheet_name))
+    atlas_path = os.path.join(atlas_dir, f'{name}.atlas')
+    with open(atlas_path, 'w') as f:
+        json.dump({sheet_name: regions}, f, sort_keys=True)
+    return atlas_path
+
+def load_index(atlas_path=ATLAS_PATH):
+    # Returns [(sheet_path, {sprite_name: [x, y, w, h]})] with y from the bottom, Kivy style
+    with open(atlas_path) as f:
+        atlas = json.load(f)
+    atlas_dir = os.path.dirname(atlas_path)
+    return [(os.path.join(atlas_dir, sheet_name), regions) for sheet_name, regions in atlas.items()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pack the sprite PNGs into one sheet plus a Kivy .atlas index')
+    parser.add_argument('--sprites', default=SPRITE_DIR)
+    parser.add_argument('--out', default=ATLAS_DIR)
+    parser.add_argument('--name', default=ATLAS_NAME)
+    args = parser.parse_args(argv)
+    print(f'Wrote {build(args.sprites, args.out, args.name)}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import time
+from src.simulation import SHOOT, EXPLOSION, POWER_UP
+
+# Sound effects, keyed by the simulation event that plays them:
+# (path, minimum seconds between starts, most voices at once, priority when stealing voices)
+EFFECTS = {
+    SHOOT: ('assets/sounds/shoot.mp3', 0.05, 2, 0),
+    EXPLOSION: ('assets/sounds/explosion.mp3', 0.03, 3, 1),
+    POWER_UP: ('assets/sounds/powerup.mp3', 0.0, 1, 2),
+}
+VOICES = 8
+
+class Effect:
+    __slots__ = ('handle', 'min_interval', 'max_voices', 'priority', 'last_played')
+
+    def __init__(self, handle, min_interval, max_voices, priority):
+        self.handle = handle
+        self.min_interval = min_interval
+        self.max_voices = max_voices
+        self.priority = priority
+        self.last_played = float('-inf')
+
+class AudioManager:
+    # Plays preloaded effects on a fixed pool of voices. A burst (a bomb, a 7-way spread) is
+    # trimmed by each effect's rate limit and voice cap, and when every voice is busy the
+    # oldest sound of equal or lower priority is cut off, so a play() call never waits.
+    # The backend does the actual mixing: load(path, copies) -> handle, play(voice, handle),
+    # busy(voice), stop(voice). With preload off, effects are registered silent and attach()
+    # supplies each handle once it has been loaded elsewhere (see src/loader.py).
+    def __init__(self, backend, voices=VOICES, effects=EFFECTS, clock=time.perf_counter, preload=True):
+        self.backend = backend
+        self.clock = clock
+        self.effects = {}
+        self.voice_effect = [None] * voices  # Effect last started on each voice
+        self.voice_started = [0.0] * voices
+        self.interval_scale = 1.0  # Stretches every effect's rate limit; the quality governor raises it
+        self.played = 0
+        self.dropped = 0
+        self.stolen = 0
+        for name, (path, min_interval, max_voices, priority) in effects.items():
+            if preload:
+                self.load(name, path, min_interval, max_voices, priority)
+            else:
+                self.effects[name] = Effect(None, min_interval, max_voices, priority)
+
+    def load(self, name, path, min_interval=0.0, max_voices=1, priority=0):
+        self.effects[name] = Effect(self.backend.load(path, max_voices), min_interval, max_voices, priority)
+
+    def attach(self, name, handle):
+        self.effects[name].handle = handle
+
+    def play(self, name):
+        effect = self.effects.get(name)
+        if effect is None or effect.handle is None:
+            return False
+        now = self.clock()
+        if now - effect.last_played < effect.min_interval * self.interval_scale:
+            self.dropped += 1
+            return False
+        voice = self.pick_voice(name, effect)
+        if voice is None:
+            self.dropped += 1
+            return False
+        if self.voice_effect[voice] is not None and self.backend.busy(voice):
+            self.stolen += 1
+        self.backend.play(voice, effect.handle)
+        self.voice_effect[voice] = name
+        self.voice_started[voice] = now
+        effect.last_played = now
+        self.played += 1
+        return True
+
+    def pick_voice(self, name, effect):
+        busy = self.backend.busy
+        started = self.voice_started
+        free = None
+        own = []  # Voices still playing this effect
+        victim = None  # Oldest voice playing something no more important
+        for voice, playing in enumerate(self.voice_effect):
+            if playing is None or not busy(voice):
+                if free is None:
+                    free = voice
+            elif playing == name:
+                own.append(voice)
+            elif self.effects[playing].priority <= effect.priority and (victim is None or started[voice] < started[victim]):
+                victim = voice
+        if len(own) >= effect.max_voices:
+            return min(own, key=started.__getitem__)  # Restart this effect's oldest voice
+        return free if free is not None else victim
+
+    def stop_all(self):
+        for voice in range(len(self.voice_effect)):
+            self.backend.stop(voice)
+            self.voice_effect[voice] = None
+
+    def stats(self):
+        return {
+            'played': self.played,
+            'dropped': self.dropped,
+            'stolen': self.stolen,
+        }
+
+class NullAudio:
+    # Backend for running without an audio device
+    def load(self, path, copies):
+        return path
+
+    def play(self, voice, handle):
+        pass
+
+    def busy(self, voice):
+        return False
+
+    def stop(self, voice):
+        pass
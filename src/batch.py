@@ -0,0 +1,123 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+import numpy as np
+from src.constants import SCREEN_WIDTH
+from src.simulation import Simulation
+
+# Plays many seeded games without a window, one per task on a process pool, for balancing.
+# Workers only import the simulation, so they start fast and each core runs games independently.
+
+# Bot policies: make_policy(seed) returns policy(sim) -> (dx, dy, shoot) for one game
+def idle_policy(seed):
+    return lambda sim: (0, 0, False)
+
+def sweep_policy(seed):
+    # Sweep left and right with the trigger held
+    return lambda sim: (1 if (sim.ticks // 60) % 2 else -1, 0, True)
+
+def random_policy(seed):
+    # Mash random directions, holding each one for a quarter of a second; has its own RNG so
+    # the game's spawns are the same as under any other policy with this seed
+    rng = random.Random(seed)
+    state = [(0, 0, False)]
+
+    def policy(sim):
+        if sim.ticks % 15 == 0:
+            state[0] = (rng.randint(-1, 1), rng.randint(-1, 1), rng.random() < 0.8)
+        return state[0]
+
+    return policy
+
+def dodge_policy(seed):
+    # Fire constantly, sidestep enemies closing in above, otherwise line up under the nearest one
+    def policy(sim):
+        player, enemies = sim.player, sim.enemies
+        n = enemies.count
+        if not n:
+            return (0, 0, True)
+        center = player.x + player.width / 2
+        enemy_centers = enemies.x[:n] + enemies.width[:n] / 2
+        gaps = player.y - (enemies.y[:n] + enemies.height[:n])
+        threats = (np.abs(enemy_centers - center) < player.width) & (gaps > -player.height) & (gaps < 150)
+        if threats.any():
+            threat = enemy_centers[threats].mean()
+            dx = -1 if threat >= center else 1
+            if (dx < 0 and player.x <= 0) or (dx > 0 and player.x + player.width >= SCREEN_WIDTH):
+                dx = -dx  # Pinned against the edge; go the other way
+            return (dx, 1, True)
+        target = enemy_centers[np.argmax(enemies.y[:n])]
+        return (int(np.sign(target - center)) if abs(target - center) > 5 else 0, 0, True)
+
+    return policy
+
+POLICIES = {
+    'idle': idle_policy,
+    'sweep': sweep_policy,
+    'random': random_policy,
+    'dodge': dodge_policy,
+}
+
+def play_game(task):
+    seed, policy_name, max_ticks = task
+    sim = Simulation(seed)
+    policy = POLICIES[policy_name](seed)
+    start = time.perf_counter()
+    while sim.ticks < max_ticks and sim.step(*policy(sim)):
+        pass
+    elapsed = time.perf_counter() - start
+    return {
+        'seed': seed,
+        'policy': policy_name,
+        'score': sim.score,
+        'ticks': sim.ticks,
+        'survival_time': round(sim.ticks * sim.dt, 3),
+        'alive': not sim.game_over,
+        'elapsed': round(elapsed, 4),
+        'ticks_per_sec': round(sim.ticks / elapsed) if elapsed else None,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Play seeded headless games in parallel and stream results as JSONL')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0, help='Game i is played with seed + i')
+    parser.add_argument('--policy', choices=POLICIES, default='dodge')
+    parser.add_argument('--max-ticks', type=int, default=36000, help='Stop a game that survives this long (36000 = 10 minutes)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes (default: one per core)')
+    parser.add_argument('--out', help='Write results here instead of stdout')
+    args = parser.parse_args(argv)
+
+    tasks = [(args.seed + i, args.policy, args.max_ticks) for i in range(args.games)]
+    # Small chunks keep the workers evenly loaded, since game lengths vary a lot
+    chunksize = max(1, args.games // (args.workers * 16))
+    out = open(args.out, 'w') if args.out else sys.stdout
+    scores = []
+    total_ticks = 0
+    total_survival = 0.0
+    start = time.perf_counter()
+    try:
+        with multiprocessing.Pool(args.workers) as pool:
+            # Results are written as each game finishes, so the order follows completion, not seed
+            for result in pool.imap_unordered(play_game, tasks, chunksize):
+                out.write(json.dumps(result) + '\n')
+                out.flush()
+                scores.append(result['score'])
+                total_ticks += result['ticks']
+                total_survival += result['survival_time']
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+
+    if scores:
+        print(f'{len(scores)} games on {args.workers} workers in {elapsed:.1f}s: mean score {np.mean(scores):.1f}, '
+              f'mean survival {total_survival / len(scores):.1f}s, {total_ticks / elapsed:.0f} ticks/s overall',
+              file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+from src.constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from src.game import Game, Controls, IDLE
+from src.simulation import BOMB
+
+# Methods timed individually, on the simulation and on the pygame front end; together they
+# make up one tick plus one frame
+SIM_PHASES = ['handle_input', 'move_entities', 'check_collisions', 'update_timers']
+GAME_PHASES = ['update_particles', 'draw']
+PHASES = SIM_PHASES + GAME_PHASES
+
+# Each scenario is (setup, policy). setup(game) runs at the start and after every game over,
+# policy(game, tick) returns the Controls for that tick.
+def setup_idle(game):
+    pass
+
+def policy_idle(game, tick):
+    return IDLE
+
+def setup_spread(game):
+    game.sim.player.power_up_level = 3
+
+def policy_spread(game, tick):
+    # Sweep left and right with the trigger held on the 7-way spread
+    return Controls(1 if (tick // 60) % 2 else -1, 0, True)
+
+def setup_bomb_cascade(game):
+    add_enemies(game, 200)
+
+def policy_bomb_cascade(game, tick):
+    if tick % 30 == 0:
+        game.sim.apply_power_up(BOMB)
+        add_enemies(game, 200)
+    return IDLE
+
+def setup_enemies_1k(game):
+    add_enemies(game, 995)
+    game.sim.player.shield = True
+
+def policy_enemies_1k(game, tick):
+    game.sim.player.shield = True  # Keep the player alive so the enemy count stays put
+    return Controls(0, 0, tick % 4 == 0)
+
+def setup_particles_10k(game):
+    for _ in range(10000 // 30):
+        game.create_explosion((random.randint(0, SCREEN_WIDTH), random.randint(0, SCREEN_HEIGHT)))
+
+def policy_particles_10k(game, tick):
+    # Top the pool back up as sparks burn out
+    for _ in range(6):
+        game.create_explosion((random.randint(0, SCREEN_WIDTH), random.randint(0, SCREEN_HEIGHT)))
+    return IDLE
+
+def add_enemies(game, count):
+    sim = game.sim
+    for _ in range(count):
+        sim.spawn_enemy(y=sim.random.randint(-SCREEN_HEIGHT, 0))
+
+SCENARIOS = OrderedDict([
+    ('idle', (setup_idle, policy_idle)),
+    ('spread', (setup_spread, policy_spread)),
+    ('bomb_cascade', (setup_bomb_cascade, policy_bomb_cascade)),
+    ('enemies_1k', (setup_enemies_1k, policy_enemies_1k)),
+    ('particles_10k', (setup_particles_10k, policy_particles_10k)),
+])
+
+def instrument(game, totals):
+    # Shadow each phase method on the instance with a wrapper that adds its run time to totals
+    for owner, names in ((game.sim, SIM_PHASES), (game, GAME_PHASES)):
+        for name in names:
+            method = getattr(owner, name)
+
+            def timed(*args, _method=method, _name=name, **kwargs):
+                start = time.perf_counter_ns()
+                result = _method(*args, **kwargs)
+                totals[_name] += time.perf_counter_ns() - start
+                return result
+
+            setattr(owner, name, timed)
+
+def new_game(seed):
+    # A fresh game per run so difficulty and timers never carry over between runs
+    random.seed(seed)
+    game = Game(headless=True, seed=seed)
+    return game
+
+def play(game, name, ticks, draw):
+    setup, policy = SCENARIOS[name]
+    setup(game)
+    resets = 0
+    for tick in range(ticks):
+        if not game.step(policy(game, tick)):
+            game.reset_game()
+            setup(game)
+            resets += 1
+        if draw:
+            game.draw()
+    return resets
+
+def run_scenario(name, ticks, seed, draw=True):
+    # Timing pass
+    game = new_game(seed)
+    totals = dict.fromkeys(PHASES, 0)
+    instrument(game, totals)
+    gc_before = sum(stat['collections'] for stat in gc.get_stats())
+    start = time.perf_counter_ns()
+    resets = play(game, name, ticks, draw)
+    elapsed = time.perf_counter_ns() - start
+    gc_runs = sum(stat['collections'] for stat in gc.get_stats()) - gc_before
+
+    # Memory pass: tracemalloc slows everything down, so it gets its own identical run
+    game = new_game(seed)
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    play(game, name, ticks, draw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = OrderedDict()
+    result['ticks'] = ticks
+    result['resets'] = resets
+    result['ns_per_tick'] = OrderedDict((phase, totals[phase] // ticks) for phase in PHASES if draw or phase != 'draw')
+    result['total_ns_per_tick'] = elapsed // ticks
+    result['gc_collections'] = gc_runs
+    result['allocated_blocks_delta'] = sys.getallocatedblocks() - blocks_before
+    result['peak_traced_kb'] = peak // 1024
+    return result
+
+def compare(results, baseline, threshold):
+    # Returns the scenarios whose total ns/tick grew by more than threshold (a fraction)
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]['total_ns_per_tick']
+        after = result['total_ns_per_tick']
+        change = (after - before) / before if before else 0.0
+        print(f'{name:>14}: {before:>10} -> {after:>10} ns/tick ({change:+.1%})')
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+def print_results(results):
+    for name, result in results.items():
+        print(f"{name}: {result['total_ns_per_tick']} ns/tick over {result['ticks']} ticks, "
+              f"{result['resets']} resets, {result['gc_collections']} GC runs, "
+              f"{result['allocated_blocks_delta']:+} blocks, peak {result['peak_traced_kb']} KB")
+        for phase, ns in result['ns_per_tick'].items():
+            print(f'    {phase:>18}: {ns:>10} ns')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Space Fighter frame loop headlessly')
+    parser.add_argument('scenarios', nargs='*', help=f"Scenarios to run, from {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument('--ticks', type=int, default=600)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--no-draw', action='store_true', help='Only time the simulation')
+    parser.add_argument('--json', help='Write results to this file')
+    parser.add_argument('--baseline', help='Compare against results previously written with --json')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed slowdown before failing (0.2 = 20%%)')
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario: {', '.join(unknown)}")
+
+    results = OrderedDict()
+    for name in args.scenarios or SCENARIOS:
+        results[name] = run_scenario(name, args.ticks, args.seed, draw=not args.no_draw)
+    print_results(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"Regressed: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
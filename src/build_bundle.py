@@ -0,0 +1,74 @@
+import argparse
+import glob
+import json
+import os
+import pygame
+from src.atlas import load_index
+from src.bundle import MAGIC, VERSION, HEADER, ALIGN, IMAGE, SOUND, FILE
+from src.constants import BUNDLE_PATH, ATLAS_PATH, SPRITE_DIR, BACKGROUND_IMAGE
+from src.loader import MANIFEST
+
+MIXER_FORMAT = (44100, -16, 2)  # What Game's mixer.init() opens with by default
+
+def build(path=BUNDLE_PATH, atlas_path=ATLAS_PATH, sprite_dir=SPRITE_DIR):
+    # Packs the atlas sheets, the background, any sprite the atlas doesn't cover and every
+    # sound in the loader's manifest. Build the atlas first (`python -m src.atlas`).
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    pygame.mixer.pre_init(*MIXER_FORMAT)
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    atlas = load_index(atlas_path) if os.path.exists(atlas_path) else []
+    packed = {os.path.join(sprite_dir, name + '.png') for _, regions in atlas for name in regions}
+    images = [sheet_path for sheet_path, _ in atlas] + [BACKGROUND_IMAGE]
+    images += [image for image in sorted(glob.glob(os.path.join(sprite_dir, '*.png'))) if image not in packed]
+
+    blobs = []  # (path, kind, bytes, what else the entry records)
+    for image_path in images:
+        image = pygame.image.load(image_path)
+        pixel_format = 'BGRA' if image.get_flags() & pygame.SRCALPHA else 'RGB'
+        blobs.append((image_path, IMAGE, pygame.image.tobytes(image, pixel_format), image.get_size() + (pixel_format,)))
+    for kind, _, sound_path, _ in MANIFEST:
+        if not os.path.exists(sound_path):
+            print(f'Skipping {sound_path}: not found')
+            continue
+        if kind == 'sound':
+            blobs.append((sound_path, SOUND, pygame.mixer.Sound(sound_path).get_raw(), ()))
+        else:
+            with open(sound_path, 'rb') as f:
+                blobs.append((sound_path, FILE, f.read(), ()))
+    pygame.quit()
+
+    # Offsets depend on the index's length, so lay the data out after a first guess at it and
+    # grow the guess until the index fits in front of the data
+    start = 4096
+    while True:
+        entries = {}
+        offset = start
+        for blob_path, kind, data, extra in blobs:
+            offset = -(-offset // ALIGN) * ALIGN
+            entries[blob_path] = [kind, offset, len(data), *extra]
+            offset += len(data)
+        index = json.dumps({'mixer': MIXER_FORMAT, 'atlas': atlas, 'entries': entries}, sort_keys=True).encode()
+        if HEADER.size + len(index) <= start:
+            break
+        start *= 2
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(index)) + index)
+        for blob_path, _, data, _ in blobs:
+            f.seek(entries[blob_path][1])
+            f.write(data)
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pack the runtime images and sounds into one memory-mappable bundle')
+    parser.add_argument('--out', default=BUNDLE_PATH)
+    parser.add_argument('--atlas', default=ATLAS_PATH)
+    parser.add_argument('--sprites', default=SPRITE_DIR)
+    args = parser.parse_args(argv)
+    print(f'Wrote {build(args.out, args.atlas, args.sprites)} ({os.path.getsize(args.out) / 1024:.0f} KiB)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+import argparse
+import os
+import numpy as np
+import pygame
+from src.assets import sprite_cache
+from src.constants import MASK_PATH
+from src.game_objects import ENEMY_IMAGES, PLAYER_IMAGE, BULLET_IMAGE
+from src.hitmask import HitMasks
+from src.simulation import PLAYER_SIZE, ENEMY_SIZE, BULLET_SIZE, BULLET_ANGLES
+
+def to_array(mask):
+    width, height = mask.get_size()
+    return np.array([[mask.get_at((x, y)) for x in range(width)] for y in range(height)], dtype=bool)
+
+def build(path=MASK_PATH):
+    # Masks of the sprites exactly as Sprites draws them: same files, sizes and rotations
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pygame.init()
+    pygame.display.set_mode((1, 1))  # convert_alpha() needs a display
+    masks = HitMasks(to_array(sprite_cache.mask(PLAYER_IMAGE, PLAYER_SIZE)),
+                     [to_array(sprite_cache.mask(image, ENEMY_SIZE)) for image in ENEMY_IMAGES],
+                     {angle: to_array(sprite_cache.mask(BULLET_IMAGE, BULLET_SIZE, angle))
+                      for angles in BULLET_ANGLES for angle in angles})
+    masks.save(path)
+    pygame.quit()
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bake the collision pixel masks from the sprites')
+    parser.add_argument('--out', default=MASK_PATH)
+    args = parser.parse_args(argv)
+    print(f'Wrote {build(args.out)}')
+
+if __name__ == '__main__':
+    main()
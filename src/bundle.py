@@ -0,0 +1,70 @@
+import io
+import json
+import mmap
+import os
+import struct
+from src.constants import BUNDLE_PATH
+
+# One file holding every runtime asset, ready to use without decoding. Built by
+# src/build_bundle.py; reading it needs neither pygame nor Kivy, so both builds can use it.
+#   header  MAGIC, VERSION, length of the index
+#   index   JSON: the mixer format the sounds were decoded for, the atlas regions, and
+#           path -> [kind, offset, size, ...] for each entry
+#   data    each entry's bytes, ALIGN-aligned
+# Images are raw pixels (BGRA, the layout convert_alpha() produces, or RGB when opaque),
+# sound effects are PCM, and music stays encoded since it is streamed anyway. Entries are
+# keyed by the paths the game already asks for, so anything missing falls back to its file.
+MAGIC = b'SFAB'
+VERSION = 1
+HEADER = struct.Struct('<4sBI')
+ALIGN = 64
+
+IMAGE = 'image'
+SOUND = 'sound'
+FILE = 'file'
+
+class AssetBundle:
+    # Reads a bundle through a read-only memory map. Entries come back as memoryview slices of
+    # the map, so nothing is read until a page is first touched, and whatever is built on
+    # them (surfaces, textures, sounds) can use the mapped bytes without a copy.
+    def __init__(self, path=BUNDLE_PATH):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, index_size = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a version {VERSION} Space Fighter asset bundle')
+        index = json.loads(self.data[HEADER.size:HEADER.size + index_size])
+        self.view = memoryview(self.data)
+        self.mixer = tuple(index['mixer'])
+        self.atlas = index['atlas']  # [(sheet path, {sprite name: [x, y, w, h]})], as load_index returns
+        self.entries = index['entries']
+
+    @classmethod
+    def open(cls, path=BUNDLE_PATH):
+        # None when the bundle hasn't been built, in which case everything loads from its file
+        if not os.path.exists(path):
+            return None
+        return cls(path)
+
+    def __contains__(self, path):
+        return path in self.entries
+
+    def bytes(self, path):
+        _, offset, size = self.entries[path][:3]
+        return self.view[offset:offset + size]
+
+    def pixels(self, path):
+        # (pixels, (width, height), pixel format), as pygame.image.frombuffer() takes them.
+        # Rows run from the top.
+        _, _, _, width, height, pixel_format = self.entries[path]
+        return self.bytes(path), (width, height), pixel_format
+
+    def pcm(self, path, mixer_format):
+        # None unless the sound is bundled as PCM decoded for mixer_format, (frequency, size,
+        # channels) as pygame.mixer.get_init() reports it
+        if self.entries.get(path, (None,))[0] != SOUND or tuple(mixer_format or ()) != self.mixer:
+            return None
+        return self.bytes(path)
+
+    def file(self, path):
+        return io.BytesIO(self.bytes(path))
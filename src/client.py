@@ -0,0 +1,117 @@
+import argparse
+import os
+import socket
+import sys
+import time
+import pygame
+from src.assets import sprite_cache
+from src.bundle import AssetBundle
+from src.constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, ATLAS_PATH, SPRITE_DIR, BACKGROUND_IMAGE
+from src.game_objects import Sprites
+from src.hud import GlyphCache, NumberLabel
+from src.netcode import (JOIN, WELCOME, FULL, INPUT, LEAVE, SNAPSHOT, WELCOME_PACKET, INPUT_PACKET,
+                         SnapshotReceiver, ClientWorld)
+from src.recording import encode_input
+
+JOIN_RETRY = 0.5  # Seconds between JOINs until the server answers
+JOIN_TIMEOUT = 10.0
+
+class CoopClient:
+    # Plays on a co-op server (src/server.py): sends the held keys every frame and draws the
+    # snapshots that come back, interpolated between the last two. Nothing is simulated here.
+    def __init__(self, host, port):
+        pygame.init()
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption('Space Fighter Co-op')
+        self.clock = pygame.time.Clock()
+        self.font = pygame.font.SysFont(None, 36)
+        self.score_label = NumberLabel(GlyphCache(self.font), 'Score: ', (10, 10))
+        bundle = AssetBundle.open()
+        if bundle:
+            sprite_cache.use_bundle(bundle, SPRITE_DIR)
+        elif os.path.exists(ATLAS_PATH):
+            sprite_cache.use_atlas(ATLAS_PATH, SPRITE_DIR)
+        self.background = sprite_cache.get(BACKGROUND_IMAGE, (SCREEN_WIDTH, SCREEN_HEIGHT), alpha=False)
+        self.sprites = Sprites()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.connect((host, port))
+        self.sock.setblocking(False)
+        self.receiver = SnapshotReceiver()
+        self.world = None
+        self.snapshot_period = 0.05
+        self.snapshot_time = 0.0  # When the newest snapshot arrived
+        self.seq = 0
+
+    def packets(self):
+        while True:
+            try:
+                yield self.sock.recv(65536)
+            except (BlockingIOError, ConnectionRefusedError):
+                return
+
+    def join(self):
+        deadline = time.monotonic() + JOIN_TIMEOUT
+        while time.monotonic() < deadline:
+            self.sock.send(bytes([JOIN]))
+            time.sleep(JOIN_RETRY)
+            for packet in self.packets():
+                if packet[0] == WELCOME:
+                    _, player_id, tick_rate, snapshot_interval = WELCOME_PACKET.unpack(packet)
+                    self.world = ClientWorld(player_id)
+                    self.snapshot_period = snapshot_interval / tick_rate
+                    return True
+                if packet[0] == FULL:
+                    print('The server is full')
+                    return False
+            pygame.event.pump()
+        print('No answer from the server')
+        return False
+
+    def run(self):
+        if not self.join():
+            return
+        try:
+            while True:
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                        return
+                keys = pygame.key.get_pressed()
+                self.seq += 1
+                self.sock.send(INPUT_PACKET.pack(INPUT, self.seq, self.receiver.ack, encode_input(
+                    keys[pygame.K_RIGHT] - keys[pygame.K_LEFT], keys[pygame.K_DOWN] - keys[pygame.K_UP],
+                    keys[pygame.K_SPACE])))
+                for packet in self.packets():
+                    if packet[0] == SNAPSHOT:
+                        received = self.receiver.receive(packet)
+                        if received:
+                            self.world.apply(received[1])
+                            self.snapshot_time = time.monotonic()
+                self.draw()
+                self.clock.tick(FPS)
+        finally:
+            self.sock.send(bytes([LEAVE]))
+            pygame.quit()
+
+    def draw(self):
+        world = self.world
+        # Snapshots are a few ticks apart, so the view runs one snapshot behind and blends
+        alpha = min((time.monotonic() - self.snapshot_time) / self.snapshot_period, 1.0)
+        self.screen.blit(self.background, (0, 0))
+        self.sprites.draw(self.screen, world, alpha, [player for player in world.players.values() if player.alive])
+        self.score_label.draw(self.screen, world.score)
+        if world.round_over or (world.player and not world.player.alive):
+            text = self.font.render('Round over' if world.round_over else 'You are out until the next round',
+                                    True, (255, 255, 255))
+            self.screen.blit(text, (SCREEN_WIDTH // 2 - text.get_width() // 2, SCREEN_HEIGHT // 2))
+        pygame.display.flip()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Join a Space Fighter co-op server')
+    parser.add_argument('host', nargs='?', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7777)
+    args = parser.parse_args(argv)
+    CoopClient(args.host, args.port).run()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,19 @@
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
-FPS = 12
+FPS = 60  # Render rate cap; game speed no longer depends on it
+TICK_RATE = 60  # Fixed simulation steps per second
+MAX_FRAME_TIME = 250  # ms of lag the simulation will catch up on before dropping time
 ENEMY_SPAWN_RATE = 0.05
-POWER_UP_SPAWN_RATE = 0.005
\ No newline at end of file
+POWER_UP_SPAWN_RATE = 0.005
+SPRITE_DIR = 'assets/spaceArt/png'
+ATLAS_DIR = 'assets/spaceArt/atlas'
+ATLAS_NAME = 'spaceArt'
+ATLAS_PATH = f'{ATLAS_DIR}/{ATLAS_NAME}.atlas'  # Built by `python -m src.atlas`
+MASK_PATH = 'assets/spaceArt/hitmasks.npz'  # Built by `python -m src.build_masks`
+BUNDLE_PATH = 'assets/assets.bundle'  # Built by `python -m src.build_bundle`
+BACKGROUND_IMAGE = 'assets/spaceArt/png/Background/starBackground.png'
+
+# Scenes the front ends' main loops switch between; only PLAYING advances the simulation
+PLAYING = 'playing'
+PAUSED = 'paused'
+GAME_OVER = 'game_over'
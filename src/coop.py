@@ -0,0 +1,81 @@
+import struct
+import zlib
+from src.constants import SCREEN_WIDTH, SCREEN_HEIGHT, TICK_RATE
+from src.simulation import Simulation, Player, EXPLOSION
+
+MAX_PLAYERS = 64
+IDLE_INPUT = (0, 0, False)
+
+class CoopPlayer(Player):
+    __slots__ = ('id', 'alive')
+
+    def __init__(self, player_id, x, y):
+        super().__init__(x, y)
+        self.id = player_id
+        self.alive = True
+
+class CoopSimulation(Simulation):
+    # The same rules with any number of players in one world, sharing the enemies and the
+    # score. A player who is hit is out until the rest are too; then the round is over
+    # (game_over) and the host calls reset() to start the next with everyone still joined.
+    def __init__(self, seed=None, tick_rate=TICK_RATE, profiler=None):
+        self.players = {}  # player id -> CoopPlayer, in join order
+        super().__init__(seed, tick_rate, profiler)
+
+    def reset(self, seed=None):
+        super().reset(seed)
+        for player_id in list(self.players):
+            self.spawn_player(player_id)
+
+    def add_player(self):
+        # Returns the new player's id, or None when the game is full
+        for player_id in range(MAX_PLAYERS):
+            if player_id not in self.players:
+                self.spawn_player(player_id)
+                return player_id
+        return None
+
+    def spawn_player(self, player_id):
+        # Spread along the bottom edge; past eight players they start on top of each other
+        x = SCREEN_WIDTH * (player_id % 8 + 1) / 9
+        self.players[player_id] = CoopPlayer(player_id, x, SCREEN_HEIGHT - 100)
+
+    def remove_player(self, player_id):
+        self.players.pop(player_id, None)
+
+    def step(self, inputs=None):
+        # inputs maps player id -> (dx, dy, shoot); players missing from it idle.
+        # Returns False once every player is out.
+        if self.game_over:
+            return False
+        inputs = inputs or {}
+        self.events = []
+        self.time += self.dt
+        self.ticks += 1
+        profiler = self.profiler
+        live = [player for player in self.players.values() if player.alive]
+        with profiler.phase('input'):
+            for player in live:
+                self.move_player(player, *inputs.get(player.id, IDLE_INPUT))
+        with profiler.phase('movement'):
+            self.move_entities()
+        with profiler.phase('collisions'):
+            self.check_bullet_hits()
+            for player in live:
+                if not self.check_player(player):
+                    player.alive = False
+                    self.events.append((EXPLOSION,) + player.center)
+        with profiler.phase('difficulty'):
+            for player in live:
+                self.update_player_timers(player)
+            self.update_spawn_timers()
+        # An empty server keeps running until someone joins
+        self.game_over = bool(self.players) and not any(player.alive for player in self.players.values())
+        return not self.game_over
+
+    def checksum(self):
+        crc = super().checksum()
+        for player in self.players.values():
+            crc = zlib.crc32(struct.pack('<Hdd??B', player.id, player.x, player.y, player.alive, player.shield,
+                                         player.power_up_level), crc)
+        return crc
@@ -0,0 +1,130 @@
+import numpy as np
+
+class EntityArray:
+    # Structure-of-arrays store for one entity type. Rows [0, count) are live; removing rows
+    # moves the last live rows into the holes, so the live block stays contiguous and every
+    # per-tick operation is a slice. Capacity doubles when full and is kept across resets.
+    # In place of an object pool's hits and misses, stats() counts spawns that reused a row
+    # some earlier entity had filled, against how often the arrays had to grow.
+    COLUMNS = ('x', 'y', 'prev_x', 'prev_y', 'width', 'height', 'vx', 'vy')
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        for name in self.COLUMNS:
+            setattr(self, name, np.zeros(capacity))
+        # What the renderer needs to pick a sprite: enemy 0 ship / 1 UFO, bullet firing
+        # angle in degrees, power-up type
+        self.variant = np.zeros(capacity, dtype=np.int16)
+        self.peak = 0  # Most rows ever filled; rows below it have held an entity before
+        self.spawns = 0
+        self.reused = 0
+        self.grows = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def capacity(self):
+        return len(self.variant)
+
+    def _columns(self):
+        return [getattr(self, name) for name in self.COLUMNS] + [self.variant]
+
+    def _grow(self):
+        self.grows += 1
+        for name in self.COLUMNS + ('variant',):
+            column = getattr(self, name)
+            grown = np.zeros(len(column) * 2, dtype=column.dtype)
+            grown[:self.count] = column[:self.count]
+            setattr(self, name, grown)
+
+    def reserve(self, count):
+        while self.capacity < count:
+            self._grow()
+
+    def add(self, x, y, width, height, vx=0.0, vy=0.0, variant=0):
+        if self.count == self.capacity:
+            self._grow()
+        index = self.count
+        self.count += 1
+        self.set(index, x, y, width, height, vx, vy, variant)
+        return index
+
+    def set(self, index, x, y, width, height, vx=0.0, vy=0.0, variant=0):
+        # A (re)spawned row starts with prev == current so it isn't interpolated from elsewhere
+        self.spawns += 1
+        if index < self.peak:
+            self.reused += 1
+        else:
+            self.peak = index + 1
+        self.x[index] = self.prev_x[index] = x
+        self.y[index] = self.prev_y[index] = y
+        self.width[index] = width
+        self.height[index] = height
+        self.vx[index] = vx
+        self.vy[index] = vy
+        self.variant[index] = variant
+
+    def move(self, dt):
+        n = self.count
+        if not n:
+            return
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+        self.x[:n] += self.vx[:n] * dt
+        self.y[:n] += self.vy[:n] * dt
+
+    def remove(self, mask):
+        # Swap-remove every row where mask (over the live rows) is set
+        n = self.count
+        dead = mask.nonzero()[0]
+        if not len(dead):
+            return
+        keep = n - len(dead)
+        holes = dead[dead < keep]
+        movers = keep + (~mask[keep:n]).nonzero()[0]  # Survivors past the end of the new block
+        for column in self._columns():
+            column[holes] = column[movers]
+        self.count = keep
+
+    def clear(self):
+        self.count = 0
+
+    def stats(self):
+        return {
+            'count': self.count,
+            'peak': self.peak,
+            'capacity': self.capacity,
+            'spawns': self.spawns,
+            'reused': self.reused,
+            'grows': self.grows,
+        }
+
+    def overlapping(self, x, y, width, height):
+        # Mask of live rows overlapping the rect; touching edges don't count, like pygame.Rect.colliderect
+        n = self.count
+        ex, ey = self.x[:n], self.y[:n]
+        return ((ex < x + width) & (x < ex + self.width[:n]) &
+                (ey < y + height) & (y < ey + self.height[:n]))
+
+    def overlap_matrix(self, other):
+        # (len(self), len(other)) mask of overlapping pairs between two arrays
+        n, m = self.count, other.count
+        x, y = self.x[:n, None], self.y[:n, None]
+        ox, oy = other.x[:m], other.y[:m]
+        return ((x < ox + other.width[:m]) & (ox < x + self.width[:n, None]) &
+                (y < oy + other.height[:m]) & (oy < y + self.height[:n, None]))
+
+    def lerp(self, alpha):
+        # Positions blended between the last two ticks by how far the renderer is into the next one
+        n = self.count
+        prev_x, prev_y = self.prev_x[:n], self.prev_y[:n]
+        return prev_x + (self.x[:n] - prev_x) * alpha, prev_y + (self.y[:n] - prev_y) * alpha
+
+    def rects(self):
+        # (x, y, width, height) tuples of the live rows, for the spatial hash
+        n = self.count
+        return list(zip(self.x[:n].tolist(), self.y[:n].tolist(), self.width[:n].tolist(), self.height[:n].tolist()))
+
+    def center(self, index):
+        return (float(self.x[index] + self.width[index] / 2), float(self.y[index] + self.height[index] / 2))
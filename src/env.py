@@ -0,0 +1,202 @@
+import multiprocessing
+import numpy as np
+from src.constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from src.simulation import Simulation, MAX_POWER_UPS, BULLET_ANGLES
+
+# Gym-style environment over a batch of independent games stepped in lock-step, for training
+# agents. No window, no pygame: observations are built straight from the simulation's arrays.
+
+# Discrete actions: every (dx, dy, shoot) combination; 0 is idle
+ACTIONS = [(dx, dy, shoot) for shoot in (False, True) for dy in (0, -1, 1) for dx in (0, -1, 1)]
+
+MAX_OBSERVED_ENEMIES = 16  # Nearest enemies included in a vector observation
+PLAYER_FEATURES = 5  # x, y, shield, power-up level, speed boost active
+ENEMY_FEATURES = 3  # dx, dy from the player, present
+POWER_UP_FEATURES = 4  # dx, dy from the player, type, present
+VECTOR_SIZE = PLAYER_FEATURES + MAX_OBSERVED_ENEMIES * ENEMY_FEATURES + MAX_POWER_UPS * POWER_UP_FEATURES
+
+GRID_CELL = 10  # Pixels per cell of a grid observation
+GRID_SHAPE = (4, SCREEN_HEIGHT // GRID_CELL, SCREEN_WIDTH // GRID_CELL)  # player, enemies, bullets, power-ups
+
+DEATH_REWARD = -1.0  # Reward on the step the player is hit; otherwise it is the points scored
+
+def observe_vector(sim, out):
+    # Positions are relative to the player and scaled by the screen size; enemies come
+    # nearest first, missing slots are zero
+    player = sim.player
+    cx, cy = player.center
+    out[:PLAYER_FEATURES] = (cx / SCREEN_WIDTH, cy / SCREEN_HEIGHT, player.shield,
+                             player.power_up_level / (len(BULLET_ANGLES) - 1), player.speed_boost_timer > 0)
+    start = PLAYER_FEATURES
+    enemies = out[start:start + MAX_OBSERVED_ENEMIES * ENEMY_FEATURES].reshape(MAX_OBSERVED_ENEMIES, ENEMY_FEATURES)
+    start += MAX_OBSERVED_ENEMIES * ENEMY_FEATURES
+    power_ups = out[start:].reshape(MAX_POWER_UPS, POWER_UP_FEATURES)
+    enemies[:] = 0
+    power_ups[:] = 0
+
+    n = sim.enemies.count
+    if n:
+        dx = (sim.enemies.x[:n] + sim.enemies.width[:n] / 2 - cx) / SCREEN_WIDTH
+        dy = (sim.enemies.y[:n] + sim.enemies.height[:n] / 2 - cy) / SCREEN_HEIGHT
+        nearest = np.argsort(dx * dx + dy * dy)[:MAX_OBSERVED_ENEMIES]
+        k = len(nearest)
+        enemies[:k, 0] = dx[nearest]
+        enemies[:k, 1] = dy[nearest]
+        enemies[:k, 2] = 1
+
+    n = min(sim.power_ups.count, MAX_POWER_UPS)
+    if n:
+        power_ups[:n, 0] = (sim.power_ups.x[:n] + sim.power_ups.width[:n] / 2 - cx) / SCREEN_WIDTH
+        power_ups[:n, 1] = (sim.power_ups.y[:n] + sim.power_ups.height[:n] / 2 - cy) / SCREEN_HEIGHT
+        power_ups[:n, 2] = sim.power_ups.variant[:n] / 3
+        power_ups[:n, 3] = 1
+
+def observe_grid(sim, out):
+    # A downscaled frame: one occupancy channel per entity type, rasterized straight from the
+    # entity arrays (the player's whole hitbox, every other entity's centre)
+    out[:] = 0
+    _, rows, cols = GRID_SHAPE
+    player = sim.player
+    left, top = int(player.x) // GRID_CELL, int(player.y) // GRID_CELL
+    out[0, top:top + player.height // GRID_CELL, left:left + player.width // GRID_CELL] = 1
+    for channel, entities in ((1, sim.enemies), (2, sim.bullets), (3, sim.power_ups)):
+        n = entities.count
+        col = ((entities.x[:n] + entities.width[:n] / 2) // GRID_CELL).astype(np.intp)
+        row = ((entities.y[:n] + entities.height[:n] / 2) // GRID_CELL).astype(np.intp)
+        on_screen = (col >= 0) & (col < cols) & (row >= 0) & (row < rows)
+        out[channel, row[on_screen], col[on_screen]] = 1
+
+OBSERVATIONS = {
+    'vector': (observe_vector, (VECTOR_SIZE,), np.float32),
+    'grid': (observe_grid, GRID_SHAPE, np.uint8),
+}
+
+class VectorEnv:
+    # num_envs games stepped together. Finished games restart straight away, so every step
+    # returns an observation per game; the finished game's stats are in that step's info.
+    def __init__(self, num_envs, seed=None, observation='vector', frame_skip=4, max_ticks=36000):
+        self.num_envs = num_envs
+        self.observe, shape, dtype = OBSERVATIONS[observation]
+        self.observation_shape = shape
+        self.frame_skip = frame_skip  # Ticks each action is held for
+        self.max_ticks = max_ticks  # Episodes this long are cut off (truncated, not terminated)
+        self.sims = [Simulation() for _ in range(num_envs)]
+        self.obs = np.zeros((num_envs,) + shape, dtype=dtype)
+        self.seed_streams = []
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        # Each game draws its episode seeds from its own stream, so runs are reproducible
+        # however the games are split across processes
+        return self.reset_streams(np.random.SeedSequence(seed).spawn(self.num_envs))
+
+    def reset_streams(self, seed_sequences):
+        self.seed_streams = [np.random.default_rng(sequence) for sequence in seed_sequences]
+        for index in range(self.num_envs):
+            self.reset_env(index)
+        return self.obs.copy()
+
+    def reset_env(self, index):
+        sim = self.sims[index]
+        sim.reset(int(self.seed_streams[index].integers(2 ** 32)))
+        self.observe(sim, self.obs[index])
+
+    def step(self, actions):
+        # actions: one index into ACTIONS per game. Returns (observations, rewards,
+        # terminated, truncated, infos) with infos a list of dicts, empty unless that game ended.
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        terminated = np.zeros(self.num_envs, dtype=bool)
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        infos = [{} for _ in range(self.num_envs)]
+        for index, action in enumerate(np.asarray(actions).tolist()):
+            sim = self.sims[index]
+            dx, dy, shoot = ACTIONS[action]
+            score = sim.score
+            alive = True
+            for _ in range(self.frame_skip):
+                alive = sim.step(dx, dy, shoot)
+                if not alive:
+                    break
+            rewards[index] = sim.score - score
+            if not alive:
+                rewards[index] += DEATH_REWARD
+                terminated[index] = True
+            elif sim.ticks >= self.max_ticks:
+                truncated[index] = True
+            self.observe(sim, self.obs[index])
+            if not alive or truncated[index]:
+                infos[index] = {'score': sim.score, 'ticks': sim.ticks, 'final_observation': self.obs[index].copy()}
+                self.reset_env(index)
+        return self.obs.copy(), rewards, terminated, truncated, infos
+
+    def close(self):
+        pass
+
+def _worker(connection, kwargs):
+    env = VectorEnv(**kwargs)
+    try:
+        while True:
+            command, data = connection.recv()
+            if command == 'step':
+                connection.send(env.step(data))
+            elif command == 'reset':
+                connection.send(env.reset_streams(data))
+            elif command == 'close':
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        connection.close()
+
+class SubprocVectorEnv:
+    # Same interface as VectorEnv, with the games split across worker processes that each
+    # step their share in lock-step. Given the same seed it plays exactly the same games.
+    def __init__(self, num_envs, workers=None, seed=None, observation='vector', frame_skip=4, max_ticks=36000):
+        workers = min(workers or multiprocessing.cpu_count(), num_envs)
+        self.num_envs = num_envs
+        self.observation_shape = OBSERVATIONS[observation][1]
+        # Contiguous shards of games, as even as possible
+        bounds = np.linspace(0, num_envs, workers + 1).astype(int)
+        self.shards = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+        self.connections = []
+        self.processes = []
+        for start, end in self.shards:
+            parent, child = multiprocessing.Pipe()
+            kwargs = dict(num_envs=end - start, observation=observation, frame_skip=frame_skip, max_ticks=max_ticks)
+            process = multiprocessing.Process(target=_worker, args=(child, kwargs), daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        streams = np.random.SeedSequence(seed).spawn(self.num_envs)
+        for connection, (start, end) in zip(self.connections, self.shards):
+            connection.send(('reset', streams[start:end]))
+        return np.concatenate([connection.recv() for connection in self.connections])
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        for connection, (start, end) in zip(self.connections, self.shards):
+            connection.send(('step', actions[start:end]))
+        results = [connection.recv() for connection in self.connections]
+        obs, rewards, terminated, truncated, infos = zip(*results)
+        return (np.concatenate(obs), np.concatenate(rewards), np.concatenate(terminated),
+                np.concatenate(truncated), [info for shard in infos for info in shard])
+
+    def close(self):
+        for connection in self.connections:
+            try:
+                connection.send(('close', None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join(timeout=1)
+        for connection in self.connections:
+            connection.close()
+
+def make_env(num_envs, subprocess=False, workers=None, **kwargs):
+    if subprocess:
+        return SubprocVectorEnv(num_envs, workers, **kwargs)
+    return VectorEnv(num_envs, **kwargs)
@@ -1,260 +1,440 @@
 import pygame
-import random
-import math
+import numpy as np
 import os
-from src.game_objects import Player, Enemy, Bullet, PowerUp
-from src.particle import Particle
-from src.constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, ENEMY_SPAWN_RATE, POWER_UP_SPAWN_RATE
+import random
+import sys
+import time
+from functools import partial
+from src.assets import sprite_cache
+from src.audio import AudioManager, NullAudio, VOICES
+from src.bundle import AssetBundle
+from src.gc_control import GCControl
+from src.game_objects import Sprites
+from src.hud import GlyphCache, NumberLabel
+from src.loader import AssetLoader, MANIFEST, read_bytes
+from src.particle import ParticleSystem
+from src.profiler import FrameProfiler
+from src.quality import QualityGovernor, TIERS
+from src.recording import InputRecorder
+from src.render import DirtyRectRenderer
+from src.simulation import Simulation, EXPLOSION
+from collections import namedtuple
+from src.constants import (SCREEN_WIDTH, SCREEN_HEIGHT, FPS, TICK_RATE, MAX_FRAME_TIME, ATLAS_PATH, SPRITE_DIR,
+                           BACKGROUND_IMAGE, PLAYING, PAUSED, GAME_OVER)
+
+# One tick of player input: dx/dy in -1..1 and whether the trigger is held this tick
+Controls = namedtuple('Controls', ['dx', 'dy', 'shoot'])
+IDLE = Controls(0, 0, False)
+
+class PygameAudio:
+    # AudioManager backend on reserved mixer channels. mixer.Sound decodes the whole file to
+    # PCM when it loads, so starting an effect never touches the decoder; sounds in the asset
+    # bundle are already PCM and skip decoding altogether.
+    def __init__(self, voices, bundle=None):
+        self.bundle = bundle
+        pygame.mixer.set_num_channels(max(voices, pygame.mixer.get_num_channels()))
+        pygame.mixer.set_reserved(voices)  # Sound.play() elsewhere can't take these
+        self.channels = [pygame.mixer.Channel(index) for index in range(voices)]
+
+    def load(self, path, copies):
+        pcm = self.bundle.pcm(path, pygame.mixer.get_init()) if self.bundle is not None else None
+        return pygame.mixer.Sound(buffer=pcm) if pcm is not None else pygame.mixer.Sound(path)
+
+    def play(self, voice, sound):
+        self.channels[voice].play(sound)
+
+    def busy(self, voice):
+        return self.channels[voice].get_busy()
+
+    def stop(self, voice):
+        self.channels[voice].stop()
 
 class Game:
-    def __init__(self):
+    def __init__(self, headless=False, profile_path=None, dirty_rects=False, seed=None, record_path=None, tick_rate=TICK_RATE,
+                 trace_allocations=False):
+        self.started = time.perf_counter()  # Startup times in profiler.metrics count from here
+        self.headless = headless
+        # Phase timings are collected while the overlay is up, or all session when profile_path
+        # is given, in which case they're written there (.csv or .json) when run() exits
+        self.profile_path = profile_path
+        self.profiler = FrameProfiler(enabled=profile_path is not None)
+        self.show_profiler = False
+        if headless:
+            # SDL's dummy drivers give us a real Surface and event queue without a window
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
+        if not headless:
+            pygame.mixer.pre_init(buffer=512)  # Small buffer so effects start with the frame that triggered them
         pygame.init()
-        pygame.mixer.init()
+        if not headless:
+            pygame.mixer.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption('Space Fighter Game')
         self.clock = pygame.time.Clock()
         self.font = pygame.font.SysFont(None, 36)
+        # HUD text is drawn from cached glyphs and only laid out again when its value changes
+        self.score_label = NumberLabel(GlyphCache(self.font), 'Score: ', (10, 10))
+        # Images and sounds come out of the memory-mapped asset bundle when it has been built
+        # (`python -m src.build_bundle`), else from the atlas and the loose files
+        self.bundle = AssetBundle.open()
+        if self.bundle:
+            sprite_cache.use_bundle(self.bundle, SPRITE_DIR)
+        elif os.path.exists(ATLAS_PATH):
+            sprite_cache.use_atlas(ATLAS_PATH, SPRITE_DIR)
+        self.profiler_font = None  # Created the first time the overlay is shown
+        self.profiler_lines = []  # Rendered report, refreshed a few times a second
+        # Every game has a seed, so any session can be recorded and replayed exactly
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.particles = ParticleSystem(self.MAX_PARTICLES, self.EXPLOSION_COLORS)
+        self.particles.rng = np.random.default_rng(self.seed)
+        # Pre-rendered sparks indexed as [color][radius] so drawing is one blits() call
+        self.particle_sprites = [[sprite_cache.circle(color, radius) if radius else None
+                                  for radius in range(int(self.PARTICLE_SIZE_RANGE[1]) + 1)]
+                                 for color in self.EXPLOSION_COLORS]
         
-        # Load sound effects
-        try:
-            self.shoot_sound = pygame.mixer.Sound('assets/sounds/shoot.mp3')
-            self.explosion_sound = pygame.mixer.Sound('assets/sounds/explosion.mp3')
-            self.power_up_sound = pygame.mixer.Sound('assets/sounds/powerup.mp3')
-            pygame.mixer.music.load('assets/sounds/background.mp3')
-        except pygame.error as e:
-            print(f"Error loading sound files: {e}")
-            sys.exit(1)
-        
-        pygame.mixer.music.play(-1)  # -1 means loop indefinitely
-        
-        # Initialize power-up spawn timer and interval
-        self.power_up_spawn_timer = 0
-        self.power_up_spawn_interval = 10000  # Spawn a power-up every 10 seconds
-        
-        self.difficulty_timer = 0
-        self.difficulty_interval = 30000  # Increase difficulty every 30 seconds
-        
+        # Load sound effects. Windowed, the manifest's critical sounds load now and the rest
+        # (other effects, music) stream in on a background thread once the first frame is up
+        self.music_loaded = False
+        if headless:
+            self.audio = AudioManager(NullAudio())
+            self.assets = None
+        else:
+            self.audio = AudioManager(PygameAudio(VOICES, self.bundle), preload=False)
+            self.assets = AssetLoader(MANIFEST,
+                                      {'sound': self.load_sound, 'music': partial(read_bytes, bundle=self.bundle)},
+                                      {'sound': self.audio.attach, 'music': self.start_music})
+            self.assets.load_critical()
+
         # Load background image
         try:
-            self.background = pygame.image.load('assets/spaceArt/png/Background/starBackground.png').convert()
-            self.background = pygame.transform.scale(self.background, (SCREEN_WIDTH, SCREEN_HEIGHT))
+            self.background = sprite_cache.get(BACKGROUND_IMAGE, (SCREEN_WIDTH, SCREEN_HEIGHT), alpha=False)
         except pygame.error as e:
             print(f"Error loading background image: {e}")
             sys.exit(1)
-        
+
+        # Everything is drawn onto target: the screen itself, or a renderer that records what
+        # was touched so only those areas are repainted and pushed to the display
+        self.dirty_rects = dirty_rects
+        self.renderer = DirtyRectRenderer(self.screen, self.background) if dirty_rects else None
+        self.target = self.renderer or self.screen
+        self.sprites = Sprites()
+        # Windowed, quality steps down when frames run over budget and back up with headroom.
+        # Headless runs stay on the top tier so their output doesn't depend on the machine.
+        self.quality = None if headless else QualityGovernor()
+        self.tier = TIERS[0]
+
+        # The rules live in the simulation; this class reads input, plays its events and draws it
+        self.sim = Simulation(self.seed, tick_rate, profiler=self.profiler)
+        self.tick_ms = 1000 * self.sim.dt
+        # With record_path, the seed and every tick's input are saved there when run() exits,
+        # for replaying with `python -m src.replay`
+        self.recorder = InputRecorder(record_path, self.seed, tick_rate) if record_path else None
+
+        # One main loop runs every scene; restarting resets the game in place, reusing the
+        # simulation's arrays, the particle pool and every loaded asset
+        self.state = PLAYING
+        self.overlay = None  # Text drawn over a paused or finished game, rendered when first needed
         self.reset_game()
 
+        # Windowed, the garbage collector only runs between frames and at scene changes, and
+        # everything loaded so far is frozen out of its scans. trace_allocations counts bytes
+        # allocated per frame with tracemalloc instead of blocks, at a cost to frame times.
+        self.gc = None if headless else GCControl(self.profiler, trace=trace_allocations)
+        if self.gc:
+            self.gc.freeze()
+
+    def load_sound(self, name, path):
+        # Runs on the loader thread: mixer.Sound decodes the whole file there
+        return self.audio.backend.load(path, self.audio.effects[name].max_voices)
+
+    def start_music(self, name, music):
+        data, hint = music
+        pygame.mixer.music.load(data, hint)
+        pygame.mixer.music.play(-1)  # -1 means loop indefinitely
+        if self.state == PAUSED:
+            pygame.mixer.music.pause()
+        self.music_loaded = True
+
+    def poll_assets(self):
+        # Called after each frame is drawn until every asset is in. The first call records the
+        # time to first frame and only then starts the loader thread, so it can't delay that frame.
+        metrics = self.profiler.metrics
+        if 'first_frame' not in metrics:
+            metrics['first_frame'] = 1000 * (time.perf_counter() - self.started)
+            self.assets.start()
+        elif self.assets.poll():
+            self.gc.freeze()  # The streamed-in assets are as long-lived as the rest
+            metrics['assets_loaded'] = 1000 * (time.perf_counter() - self.started)
+            print(f"Startup: first frame in {metrics['first_frame']:.0f} ms, "
+                  f"all assets in {metrics['assets_loaded']:.0f} ms")
+
+    @property
+    def score(self):
+        return self.sim.score
+
     def reset_game(self):
-        self.player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 100)
-        self.enemies = [Enemy(random.randint(0, SCREEN_WIDTH - 30), random.randint(-150, -50)) for _ in range(5)]
-        self.bullets = []
-        self.power_ups = []
-        self.particles = []
-        self.score = 0
-        self.last_power_up_spawn = pygame.time.get_ticks()
+        # Start the next game (the simulation's random stream carries on, so a recording that
+        # spans several games replays exactly)
+        self.sim.reset()
+        self.particles.clear()
+        if self.renderer:
+            self.renderer.invalidate()  # The game over screen replaced the whole frame
+        if self.music_loaded and self.state == GAME_OVER:
+            pygame.mixer.music.play(-1)  # Restart the music
+        self.set_state(PLAYING)
+
+    def set_state(self, state):
+        if not self.headless:
+            if state == PAUSED:
+                pygame.mixer.pause()
+                pygame.mixer.music.pause()
+            elif self.state == PAUSED:
+                pygame.mixer.unpause()
+                pygame.mixer.music.unpause()
+        self.state = state
+        self.overlay = None
+        if state != PLAYING and self.gc:
+            self.gc.collect()  # Nobody is playing, so nobody sees the pause
 
     def run(self):
-        running = True
+        lag = 0.0  # Wall-clock ms not yet simulated
+        if self.gc:
+            self.gc.start()
         try:
-            while running:
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        running = False
-                        return  # Exit the run method immediately
-                    elif event.type == pygame.KEYDOWN:
-                        if event.key == pygame.K_SPACE:
-                            self.shoot()
-                        elif event.key == pygame.K_ESCAPE:  # Add an escape key to quit
-                            running = False
-                            return  # Exit the run method immediately
-
-                if not self.update():
-                    running = False
-                self.draw()
-                self.clock.tick(FPS)
+            while True:
+                self.profiler.begin_frame()
+                if self.gc:
+                    self.gc.begin_frame()
+                with self.profiler.phase('events'):
+                    for event in pygame.event.get():
+                        if not self.handle_event(event):
+                            return
+
+                # Run as many fixed ticks as the elapsed time covers, then draw once,
+                # interpolating between the last two ticks for the leftover fraction
+                elapsed = min(self.clock.tick(FPS), MAX_FRAME_TIME)
+                # get_rawtime() is the last frame's work, without the wait for the frame cap
+                if self.quality and self.quality.record(self.clock.get_rawtime(), time.perf_counter() - self.started):
+                    self.apply_quality()
+                # Paused or over, no time is owed to the simulation. lag keeps the fraction of a
+                # tick the picture was at, so a paused frame looks exactly like the last one played.
+                if self.state == PLAYING:
+                    lag += elapsed
+                while lag >= self.tick_ms:
+                    lag -= self.tick_ms
+                    if not self.update():
+                        lag = 0.0
+                if self.state == GAME_OVER:
+                    self.draw_game_over()
+                else:
+                    self.draw(lag / self.tick_ms)
+                if self.assets and not self.assets.done:
+                    self.poll_assets()
+                if self.gc:
+                    self.gc.end_frame()  # After the flip, in the slack before the next frame
+                self.profiler.end_frame()
         except pygame.error:
             print("Pygame error occurred. The game window may have been closed.")
         finally:
+            if self.profile_path:
+                self.profiler.dump(self.profile_path, self.stats())
+            if self.recorder:
+                self.recorder.save()
+            if self.gc:
+                self.gc.stop()
             pygame.mixer.music.stop()  # Stop the music when the game ends
             pygame.quit()
 
-    def update(self):
-        keys = pygame.key.get_pressed()
-        dx = keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]
-        dy = keys[pygame.K_DOWN] - keys[pygame.K_UP]
-
-        # Check if moving diagonally
-        if dx != 0 and dy != 0:
-            # Normalize the movement vector to maintain consistent speed
-            dx *= 0.7071  # 1/sqrt(2)
-            dy *= 0.7071
-
-        self.player.move(dx, dy)
-
-        for enemy in self.enemies[:]:
-            enemy.move()  # Use the enemy's move method
-            if enemy.rect.top > SCREEN_HEIGHT:
-                self.enemies.remove(enemy)
-                self.enemies.append(Enemy(random.randint(0, SCREEN_WIDTH - 30), random.randint(-150, -50)))
-
-        for bullet in self.bullets[:]:
-            bullet.move()
-            if bullet.rect.bottom < 0:
-                self.bullets.remove(bullet)
-
-        self.power_up_spawn_timer += self.clock.get_time()
-        if self.power_up_spawn_timer >= self.power_up_spawn_interval:
-            self.spawn_power_up()
-            self.power_up_spawn_timer = 0
-
-        for power_up in self.power_ups[:]:
-            power_up.move()
-            if power_up.rect.top > SCREEN_HEIGHT:
-                self.power_ups.remove(power_up)
-
-        collisions_ok = self.check_collisions()
-
-        # Update particles
-        dt = self.clock.get_time() / 1000.0  # Convert milliseconds to seconds
-        for particle in self.particles[:]:
-            if particle.update(dt):
-                self.particles.remove(particle)
-        
-        # Update difficulty
-        self.difficulty_timer += self.clock.get_time()
-        if self.difficulty_timer >= self.difficulty_interval:
-            self.increase_difficulty()
-            self.difficulty_timer = 0
+    def stats(self):
+        # The session's counters, saved with a JSON profile
+        stats = {'entities': self.sim.entity_stats(), 'audio': self.audio.stats(), 'sprites': sprite_cache.stats()}
+        if self.quality:
+            stats['quality'] = self.quality.stats()
+        if self.gc:
+            stats['gc'] = self.gc.stats()
+        return stats
 
-        if not collisions_ok:
-            self.game_over()
-            return False  # Signal to end the game loop
+    def apply_quality(self):
+        tier = self.tier = self.quality.tier
+        self.audio.interval_scale = tier.sound_interval
+        dirty_rects = self.dirty_rects or tier.dirty_rects
+        if dirty_rects != (self.renderer is not None):
+            self.renderer = DirtyRectRenderer(self.screen, self.background) if dirty_rects else None
+            self.target = self.renderer or self.screen
 
-        return True  # Continue the game
+    def handle_event(self, event):
+        # Returns False when the player quits
+        if event.type == pygame.QUIT:
+            return False
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                return False
+            if event.key == pygame.K_F3:
+                self.toggle_profiler()
+            elif self.state == GAME_OVER:
+                if event.key == pygame.K_r:
+                    self.reset_game()
+                elif event.key == pygame.K_q:
+                    return False
+            elif event.key == pygame.K_p:
+                self.set_state(PLAYING if self.state == PAUSED else PAUSED)
+        elif event.type == pygame.WINDOWFOCUSLOST and self.state == PLAYING:
+            self.set_state(PAUSED)
+        elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE) and self.renderer:
+            self.renderer.invalidate()
+        return True
 
-    def shoot(self):
-        angles = self.get_bullet_angles()
-        for angle in angles:
-            self.bullets.append(Bullet(self.player.rect.centerx, self.player.rect.top, angle))
-        self.shoot_sound.play()
-
-    def get_bullet_angles(self):
-        if self.player.power_up_level == 0:
-            return [0]
-        elif self.player.power_up_level == 1:
-            return [-15, 0, 15]
-        elif self.player.power_up_level == 2:
-            return [-30, -15, 0, 15, 30]
-        else:
-            return [-45, -30, -15, 0, 15, 30, 45]
-
-    def spawn_power_up(self):
-        if len(self.power_ups) < 3:  # Limit the number of power-ups on screen
-            x = random.randint(0, SCREEN_WIDTH - 20)
-            y = -20
-            power_up_type = random.randint(0, 3)
-            self.power_ups.append(PowerUp(x, y, power_up_type))
-
-    def check_collisions(self):
-        # Check bullet-enemy collisions
-        for enemy in self.enemies[:]:
-            for bullet in self.bullets[:]:
-                if enemy.rect.colliderect(bullet.rect):
-                    self.enemies.remove(enemy)
-                    self.bullets.remove(bullet)
-                    self.score += 1
-                    self.enemies.append(Enemy(random.randint(0, SCREEN_WIDTH - 30), random.randint(-150, -50)))
-                    self.explosion_sound.play()
-                    break  # Break to avoid checking removed bullet against other enemies
-
-        # Check player-enemy collisions
-        for enemy in self.enemies[:]:
-            if self.player.rect.colliderect(enemy.rect):
-                if self.player.shield:
-                    self.player.shield = False
-                    self.enemies.remove(enemy)
-                    self.explosion_sound.play()
-                else:
-                    return False  # End the game if player collides with enemy
+    def toggle_profiler(self):
+        self.show_profiler = not self.show_profiler
+        # Keep recording after the overlay closes only if the session is being exported
+        self.profiler.set_enabled(self.show_profiler or self.profile_path is not None)
+
+    def step(self, controls=IDLE):
+        # Advance exactly one tick of game time with scripted input, without waiting on the clock
+        return self.update(controls)
+
+    def run_headless(self, max_ticks, policy=None, games=1):
+        # Play up to games games back to back, or until max_ticks in all, as fast as the CPU
+        # allows. policy(game) -> Controls
+        start = time.perf_counter()
+        ticks = 0
+        alive = True
+        scores = []  # Final score of each finished game
+        while ticks < max_ticks:
+            alive = self.step(policy(self) if policy else IDLE)
+            ticks += 1
+            if not alive:
+                scores.append(self.score)
+                if len(scores) == games:
+                    break
+                self.reset_game()
+        elapsed = time.perf_counter() - start
+        return {
+            'ticks': ticks,
+            'score': self.score,
+            'scores': scores,
+            'alive': alive,
+            'elapsed': elapsed,
+            'ticks_per_sec': ticks / elapsed if elapsed else float('inf'),
+        }
 
-        # Check player-powerup collisions
-        for power_up in self.power_ups[:]:
-            if self.player.rect.colliderect(power_up.rect):
-                self.apply_power_up(power_up.type)
-                self.power_ups.remove(power_up)
+    def update(self, controls=None):
+        if controls is None:
+            controls = self.read_controls()
+        if self.recorder:
+            self.recorder.record(*controls)
+        alive = self.sim.step(*controls)
+        if self.recorder:
+            self.recorder.checkpoint(self.sim)
+        self.play_events()
+        with self.profiler.phase('particles'):
+            self.update_particles(self.sim.dt)
+
+        if not alive:
+            self.set_state(GAME_OVER)
+            return False  # This game is over; reset_game() starts the next
 
         return True  # Continue the game
 
-    def apply_power_up(self, power_up_type):
-        if power_up_type == 0:  # Shield
-            self.player.shield = True
-        elif power_up_type == 1:  # Rapid Fire
-            self.player.power_up_level = min(self.player.power_up_level + 1, 3)
-        elif power_up_type == 2:  # Bomb
-            for enemy in self.enemies[:]:
-                self.create_explosion(enemy.rect.center)
-                self.enemies.remove(enemy)
-                self.score += 1
-            self.enemies = [Enemy(random.randint(0, SCREEN_WIDTH - 30), random.randint(-150, -50)) for _ in range(5)]
-        elif power_up_type == 3:  # Speed Boost
-            self.player.speed = 8
-            self.player.speed_boost_timer = pygame.time.get_ticks()
-        self.power_up_sound.play()
-
-    MAX_PARTICLES = 500  # Define a reasonable limit
+    def read_controls(self):
+        keys = pygame.key.get_pressed()
+        return Controls(keys[pygame.K_RIGHT] - keys[pygame.K_LEFT], keys[pygame.K_DOWN] - keys[pygame.K_UP],
+                        keys[pygame.K_SPACE])
+
+    def play_events(self):
+        for kind, x, y in self.sim.events:
+            if kind == EXPLOSION:
+                self.create_explosion((x, y))
+            self.audio.play(kind)
+
+    def update_particles(self, dt):
+        self.particles.update(dt)
+
+    MAX_PARTICLES = 20000  # Ring capacity; the oldest sparks are recycled once it fills
+    EXPLOSION_COLORS = [(255, 165, 0), (255, 69, 0), (255, 0, 0)]
+    PARTICLE_SIZE_RANGE = (5, 15)
 
     def create_explosion(self, position):
-        if len(self.particles) < self.MAX_PARTICLES:
-            for _ in range(30):
-                size = random.uniform(5, 15)
-                color = random.choice([(255, 165, 0), (255, 69, 0), (255, 0, 0)])
-                self.particles.append(Particle(position[0], position[1], color, size))
+        tier = self.tier
+        self.particles.emit(position[0], position[1], max(1, round(30 * tier.particles)), self.PARTICLE_SIZE_RANGE,
+                            speed=24, lifetime_range=(0.5 * tier.lifetime, 1.5 * tier.lifetime))
+
+    def draw_particles(self):
+        particles = self.particles
+        visible = particles.visible()
+        if not len(visible):
+            return
+        radii = particles.size[visible].astype(np.intp)
+        lefts = (particles.x[visible] - radii).astype(np.intp).tolist()
+        tops = (particles.y[visible] - radii).astype(np.intp).tolist()
+        sprites = self.particle_sprites
+        self.target.blits([(sprites[color][radius], (left, top))
+                           for color, radius, left, top
+                           in zip(particles.color[visible].tolist(), radii.tolist(), lefts, tops)],
+                          doreturn=False)
+
+    def render_overlay(self, lines, y):
+        # Centered lines of text, 50 px apart, as (surface, position) pairs
+        overlay = []
+        for line in lines:
+            text = self.font.render(line, True, (255, 255, 255))
+            overlay.append((text, (SCREEN_WIDTH // 2 - text.get_width() // 2, y)))
+            y += 50
+        return overlay
 
-    def game_over(self):
+    def draw_game_over(self):
+        if self.overlay is None:
+            self.overlay = self.render_overlay(['Game Over', f'Final Score: {self.score}',
+                                                'Press R to Restart or Q to Quit'], SCREEN_HEIGHT // 2 - 50)
         self.screen.fill((0, 0, 0))
-        game_over_text = self.font.render('Game Over', True, (255, 255, 255))
-        score_text = self.font.render(f'Final Score: {self.score}', True, (255, 255, 255))
-        restart_text = self.font.render('Press R to Restart or Q to Quit', True, (255, 255, 255))
-        self.screen.blit(game_over_text, (SCREEN_WIDTH // 2 - game_over_text.get_width() // 2, SCREEN_HEIGHT // 2 - 50))
-        self.screen.blit(score_text, (SCREEN_WIDTH // 2 - score_text.get_width() // 2, SCREEN_HEIGHT // 2))
-        self.screen.blit(restart_text, (SCREEN_WIDTH // 2 - restart_text.get_width() // 2, SCREEN_HEIGHT // 2 + 50))
+        self.screen.blits(self.overlay, doreturn=False)
         pygame.display.flip()
 
-        waiting = True
-        while waiting:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    return False  # Quit the game
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_r:
-                        pygame.mixer.music.play(-1)  # Restart the music
-                        self.reset_game()
-                        return True  # Restart the game
-                    elif event.key == pygame.K_q:
-                        return False  # Quit the game
-            self.clock.tick(FPS)  # Add a tick to prevent the loop from running too fast
-
-        return False  # If we get here, the game should end
-
-    def increase_difficulty(self):
-        for enemy in self.enemies:
-            enemy.speed *= 1.1
-        self.power_up_spawn_interval *= 0.9
-
-    def draw(self):
-        self.screen.blit(self.background, (0, 0))  # Draw background first
-        self.player.draw(self.screen)
-        for enemy in self.enemies:
-            enemy.draw(self.screen)
-        for bullet in self.bullets:
-            bullet.draw(self.screen)
-        for power_up in self.power_ups:
-            power_up.draw(self.screen)
-        
-        score_text = self.font.render(f'Score: {self.score}', True, (255, 255, 255))
-        self.screen.blit(score_text, (10, 10))
-        
-        for particle in self.particles:
-            particle.draw(self.screen)
-        
-        pygame.display.flip()
\ No newline at end of file
+    def draw(self, alpha=1.0):
+        # alpha is how far between the previous and current tick this frame falls
+        profiler = self.profiler
+        target = self.target
+        with profiler.phase('background'):
+            if self.renderer:
+                self.renderer.begin()  # Paints background back over last frame's sprites only
+            else:
+                self.screen.blit(self.background, (0, 0))  # Draw background first
+        with profiler.phase('sprites'):
+            self.sprites.draw(target, self.sim, alpha)
+
+        with profiler.phase('text'):
+            self.score_label.draw(target, self.score)
+
+        with profiler.phase('particles_draw'):
+            self.draw_particles()
+
+        if self.state == PAUSED:
+            if self.overlay is None:
+                self.overlay = self.render_overlay(['Paused', 'Press P to Resume'], SCREEN_HEIGHT // 2 - 25)
+            target.blits(self.overlay, doreturn=False)
+
+        if self.show_profiler:
+            self.draw_profiler()
+
+        with profiler.phase('flip'):
+            if self.renderer:
+                self.renderer.end()
+            else:
+                pygame.display.flip()
+
+    def draw_profiler(self):
+        if self.profiler_font is None:
+            self.profiler_font = pygame.font.SysFont('monospace', 14)
+        # Rasterizing the report every frame would cost more than most of what it measures
+        if not self.profiler_lines or self.profiler.frame % 15 == 0:
+            lines = self.profiler.report_lines()
+            if self.quality:
+                lines.append(f'quality        {self.tier.name}')
+            if self.gc:
+                lines += self.gc.report_lines()
+            lines += self.sim.entity_report_lines()
+            self.profiler_lines = [self.profiler_font.render(line, True, (0, 255, 0), (0, 0, 0)) for line in lines]
+        y = 40
+        for text in self.profiler_lines:
+            self.target.blit(text, (10, y))
+            y += text.get_height()
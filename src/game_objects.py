@@ -1,97 +1,53 @@
-import pygame
-import math
-from src.constants import SCREEN_WIDTH, SCREEN_HEIGHT
-
-class GameObject:
-    def __init__(self, x, y, width, height):
-        self.rect = pygame.Rect(x, y, width, height)
-
-    def draw(self, screen):
-        pass
-
-class Player(GameObject):
-    def __init__(self, x, y):
-        super().__init__(x, y, 100, 100)  # Increased size
-        self.original_image = pygame.image.load('assets/spaceArt/png/player.png').convert_alpha()
-        self.image = pygame.transform.scale(self.original_image, (100, 100))  # Increased size
-        self.damaged_image = pygame.image.load('assets/spaceArt/png/playerDamaged.png').convert_alpha()
-        self.damaged_image = pygame.transform.scale(self.damaged_image, (100, 100))  # Increased size
-        self.rect = self.image.get_rect(center=(x, y))
-        self.base_speed = 10  # Increased base speed
-        self.speed = self.base_speed
-        self.shield = False
-        self.power_up_level = 0
-        self.speed_boost_timer = 0
-        self.rapid_fire_timer = 0
-
-    def move(self, dx, dy):
-        if dx != 0 and dy != 0:
-            # Normalize diagonal movement
-            dx *= 0.7071
-            dy *= 0.7071
-        self.rect.x += dx * self.speed
-        self.rect.y += dy * self.speed
-        self.rect.clamp_ip(pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
-
-    def draw(self, screen):
-        if self.shield:
-            screen.blit(self.image, self.rect)
-            shield_image = pygame.image.load('assets/spaceArt/png/shield.png').convert_alpha()
-            shield_image = pygame.transform.scale(shield_image, (self.rect.width + 20, self.rect.height + 20))
-            screen.blit(shield_image, (self.rect.x - 10, self.rect.y - 10))
-        else:
-            screen.blit(self.damaged_image if self.power_up_level > 0 else self.image, self.rect)
-
-class Enemy(GameObject):
-    def __init__(self, x, y, is_ufo=False):
-        super().__init__(x, y, 30, 40)
-        image_path = 'assets/spaceArt/png/enemyUFO.png' if is_ufo else 'assets/spaceArt/png/enemyShip.png'
-        self.image = pygame.image.load(image_path).convert_alpha()
-        self.image = pygame.transform.scale(self.image, (30, 40))
-        self.rect = self.image.get_rect(topleft=(x, y))
-        self.health = 1
-        self.speed = 2
-
-    def move(self):
-        self.rect.y += self.speed
-
-    def draw(self, screen):
-        screen.blit(self.image, self.rect)
-
-class Bullet(GameObject):
-    def __init__(self, x, y, angle, is_enemy=False):
-        super().__init__(x, y, 5, 10)
-        image_path = 'assets/spaceArt/png/laserRed.png' if is_enemy else 'assets/spaceArt/png/laserGreen.png'
-        self.image = pygame.image.load(image_path).convert_alpha()
-        self.image = pygame.transform.scale(self.image, (5, 10))
-        self.image = pygame.transform.rotate(self.image, angle)
-        self.rect = self.image.get_rect(center=(x, y))
-        self.angle = angle
-        self.speed = 7
-
-    def move(self):
-        self.rect.x += self.speed * math.sin(math.radians(self.angle))
-        self.rect.y -= self.speed * math.cos(math.radians(self.angle))
-
-    def draw(self, screen):
-        screen.blit(self.image, self.rect)
-
-class PowerUp(GameObject):
-    def __init__(self, x, y, type):
-        super().__init__(x, y, 20, 20)
-        self.type = type
-        self.speed = 2
-        self.images = {
-            0: pygame.image.load('assets/spaceArt/png/shield.png').convert_alpha(),
-            1: pygame.image.load('assets/spaceArt/png/laserGreenShot.png').convert_alpha(),
-            2: pygame.image.load('assets/spaceArt/png/meteorSmall.png').convert_alpha(),
-            3: pygame.image.load('assets/spaceArt/png/life.png').convert_alpha()
-        }
-        self.image = pygame.transform.scale(self.images[type], (20, 20))
-        self.rect = self.image.get_rect(topleft=(x, y))
-
-    def move(self):
-        self.rect.y += self.speed
-
-    def draw(self, screen):
-        screen.blit(self.image, self.rect)
\ No newline at end of file
+import numpy as np
+from src.assets import sprite_cache
+from src.simulation import PLAYER_SIZE, ENEMY_SIZE, BULLET_SIZE, POWER_UP_SIZE, BULLET_ANGLES
+
+# Entity state lives in src.simulation; this module only knows what each entity looks like
+
+PLAYER_IMAGE = 'assets/spaceArt/png/player.png'
+BULLET_IMAGE = 'assets/spaceArt/png/laserGreen.png'
+
+ENEMY_IMAGES = [
+    'assets/spaceArt/png/enemyShip.png',
+    'assets/spaceArt/png/enemyUFO.png',
+]
+
+POWER_UP_IMAGES = {
+    0: 'assets/spaceArt/png/shield.png',
+    1: 'assets/spaceArt/png/laserGreenShot.png',
+    2: 'assets/spaceArt/png/meteorSmall.png',
+    3: 'assets/spaceArt/png/life.png'
+}
+
+def render_pos(entity, alpha):
+    # Blend the last two simulated positions by how far the renderer is into the next tick
+    return (round(entity.prev_x + (entity.x - entity.prev_x) * alpha),
+            round(entity.prev_y + (entity.y - entity.prev_y) * alpha))
+
+class Sprites:
+    # pygame images for the simulation's entities, indexed by each entity's variant
+    def __init__(self):
+        self.player = sprite_cache.get(PLAYER_IMAGE, PLAYER_SIZE)
+        self.player_damaged = sprite_cache.get('assets/spaceArt/png/playerDamaged.png', PLAYER_SIZE)
+        self.shield = sprite_cache.get('assets/spaceArt/png/shield.png', (PLAYER_SIZE[0] + 20, PLAYER_SIZE[1] + 20))
+        self.enemies = [sprite_cache.get(path, ENEMY_SIZE) for path in ENEMY_IMAGES]
+        self.bullets = {angle: sprite_cache.get(BULLET_IMAGE, BULLET_SIZE, angle)
+                        for angles in BULLET_ANGLES for angle in angles}
+        self.power_ups = {power_up_type: sprite_cache.get(path, POWER_UP_SIZE)
+                          for power_up_type, path in POWER_UP_IMAGES.items()}
+
+    def draw(self, target, sim, alpha=1.0, players=None):
+        # players defaults to the simulation's one player; the co-op client passes everyone's
+        blits = []
+        for player in (sim.player,) if players is None else players:
+            x, y = render_pos(player, alpha)
+            if player.shield:
+                blits += [(self.player, (x, y)), (self.shield, (x - 10, y - 10))]
+            else:
+                blits.append((self.player_damaged if player.power_up_level > 0 else self.player, (x, y)))
+        for images, entities in ((self.enemies, sim.enemies), (self.bullets, sim.bullets),
+                                 (self.power_ups, sim.power_ups)):
+            x, y = entities.lerp(alpha)
+            blits.extend(zip(map(images.__getitem__, entities.variant[:entities.count].tolist()),
+                             zip(np.rint(x).astype(np.intp).tolist(), np.rint(y).astype(np.intp).tolist())))
+        target.blits(blits, doreturn=False)
@@ -0,0 +1,110 @@
+import gc
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+YOUNG_LIMIT = 10000  # New container objects allowed to pile up before an end-of-frame collection
+MIDDLE_EVERY = 10  # Every this many young collections, also collect the middle generation
+
+class GCControl:
+    # Keeps the garbage collector out of the middle of frames:
+    # - freeze() after loading moves everything alive into the permanent generation, so
+    #   collections stop rescanning assets, caches and the imported modules.
+    # - Between start() and stop(), automatic collection is off. end_frame() runs a young
+    #   collection after the frame has been shown, once enough objects have piled up (idle()
+    #   does the same between frames that aren't counted), and
+    #   collect() does a full one at scene changes (game over, pause) where a pause can't be seen.
+    # - Every collection is timed through gc.callbacks and added to the profiler's 'gc' phase.
+    #   Allocations per frame are counted as net allocated blocks, or with trace, as the most
+    #   bytes tracemalloc saw allocated at once during the frame.
+    def __init__(self, profiler, young_limit=YOUNG_LIMIT, trace=False, window=300):
+        self.profiler = profiler
+        self.young_limit = young_limit
+        self.trace = trace
+        self.allocations = deque(maxlen=window)  # Per frame: blocks, or bytes with trace
+        self.collections = [0, 0, 0]  # By generation
+        self.pause_max_ns = 0
+        self.young_runs = 0
+        self.running = False
+        self._frame_start = 0
+        self._gc_start = 0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        gc.callbacks.append(self.on_gc)
+        gc.disable()
+        if self.trace:
+            tracemalloc.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        gc.callbacks.remove(self.on_gc)
+        gc.enable()
+        if self.trace:
+            tracemalloc.stop()
+
+    def freeze(self):
+        # Call once loading is done; may be called again after more has loaded
+        gc.collect()
+        gc.freeze()
+
+    def collect(self):
+        gc.collect()
+
+    def begin_frame(self):
+        if self.trace:
+            tracemalloc.reset_peak()
+            self._frame_start = tracemalloc.get_traced_memory()[0]
+        else:
+            self._frame_start = sys.getallocatedblocks()
+
+    def end_frame(self):
+        if self.trace:
+            self.allocations.append(tracemalloc.get_traced_memory()[1] - self._frame_start)
+        else:
+            self.allocations.append(sys.getallocatedblocks() - self._frame_start)
+        self.idle()
+
+    def idle(self):
+        # The young collection end_frame() does, without counting a frame: for callbacks that
+        # don't draw one (a paused or finished game), so garbage still gets collected there
+        if self.running and gc.get_count()[0] >= self.young_limit:
+            self.young_runs += 1
+            gc.collect(1 if self.young_runs % MIDDLE_EVERY == 0 else 0)
+
+    def on_gc(self, phase, info):
+        if phase == 'start':
+            self._gc_start = time.perf_counter_ns()
+            return
+        ns = time.perf_counter_ns() - self._gc_start
+        self.collections[info['generation']] += 1
+        self.pause_max_ns = max(self.pause_max_ns, ns)
+        profiler = self.profiler
+        if profiler.enabled:
+            current = profiler.current
+            current['gc'] = current.get('gc', 0) + ns
+
+    def report_lines(self):
+        allocations = sorted(self.allocations)
+        if allocations:
+            last = len(allocations) - 1
+            p50, p95 = allocations[last // 2], allocations[int(0.95 * last)]
+        else:
+            p50 = p95 = 0
+        unit = 'bytes' if self.trace else 'blocks'
+        return [
+            f'alloc/frame    {p50} p50, {p95} p95 {unit}',
+            f'gc runs        {"/".join(map(str, self.collections))}, max {self.pause_max_ns / 1e6:.2f} ms',
+        ]
+
+    def stats(self):
+        return {
+            'collections': list(self.collections),
+            'pause_max_ms': self.pause_max_ns / 1e6,
+            'frozen': gc.get_freeze_count(),
+        }
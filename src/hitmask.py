@@ -0,0 +1,43 @@
+import os
+import numpy as np
+from src.constants import MASK_PATH
+
+# Pixel masks for the collision narrow phase, as bool arrays indexed [row, column]. They are
+# baked from the sprites by src/build_masks.py so the simulation can use them with numpy alone,
+# and so every front end, the server and headless runs agree on exactly what counts as a hit.
+
+def overlap(mask, x, y, other, other_x, other_y):
+    # Whether two masks drawn with their top-left corners at these world positions share a
+    # solid pixel. Positions are rounded the way the renderers round them.
+    dx = int(round(other_x)) - int(round(x))
+    dy = int(round(other_y)) - int(round(y))
+    height, width = mask.shape
+    other_height, other_width = other.shape
+    x0, y0 = max(dx, 0), max(dy, 0)
+    x1, y1 = min(width, dx + other_width), min(height, dy + other_height)
+    if x0 >= x1 or y0 >= y1:
+        return False
+    return bool((mask[y0:y1, x0:x1] & other[y0 - dy:y1 - dy, x0 - dx:x1 - dx]).any())
+
+class HitMasks:
+    # player: the player's mask; enemies: one per enemy variant; bullets: firing angle -> mask
+    def __init__(self, player, enemies, bullets):
+        self.player = player
+        self.enemies = enemies
+        self.bullets = bullets
+
+    @classmethod
+    def load(cls, path=MASK_PATH):
+        # None when the masks haven't been built, in which case collisions stay rect-only
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            enemies = [data[f'enemy{variant}'] for variant in range(int(data['enemy_variants']))]
+            bullets = {int(name[len('bullet'):]): data[name] for name in data.files if name.startswith('bullet')}
+            return cls(data['player'], enemies, bullets)
+
+    def save(self, path=MASK_PATH):
+        arrays = {'player': self.player, 'enemy_variants': np.array(len(self.enemies))}
+        arrays.update((f'enemy{variant}', mask) for variant, mask in enumerate(self.enemies))
+        arrays.update((f'bullet{angle}', mask) for angle, mask in self.bullets.items())
+        np.savez_compressed(path, **arrays)
@@ -0,0 +1,41 @@
+import pygame
+
+class GlyphCache:
+    # Text surfaces for one font and color, rasterized the first time they're asked for
+    def __init__(self, font, color=(255, 255, 255)):
+        self.font = font
+        self.color = color
+        self.surfaces = {}
+
+    def render(self, text):
+        surface = self.surfaces.get(text)
+        if surface is None:
+            surface = self.surfaces[text] = self.font.render(text, True, self.color)
+        return surface
+
+class NumberLabel:
+    # '<prefix><number>' put together from the cached prefix and one cached glyph per digit.
+    # The composed surface is only rebuilt when the value changes, so a steady frame costs
+    # one blit and no font rendering.
+    def __init__(self, glyphs, prefix, pos):
+        self.glyphs = glyphs
+        self.prefix = prefix
+        self.pos = pos
+        self.value = None
+        self.surface = None
+
+    def layout(self, value):
+        parts = [self.glyphs.render(text) for text in [self.prefix] + list(str(value))]
+        surface = pygame.Surface((sum(part.get_width() for part in parts), max(part.get_height() for part in parts)),
+                                 pygame.SRCALPHA)
+        x = 0
+        for part in parts:
+            surface.blit(part, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)  # Copy, not blend: glyphs never overlap
+            x += part.get_width()
+        self.value = value
+        self.surface = surface
+
+    def draw(self, target, value):
+        if value != self.value:
+            self.layout(value)
+        target.blit(self.surface, self.pos)
@@ -0,0 +1,87 @@
+import io
+import os
+import queue
+import threading
+from src.audio import EFFECTS
+from src.simulation import SHOOT, EXPLOSION, POWER_UP
+
+# Assets loaded outside the sprite atlas: (kind, name, path, critical). Critical assets load
+# before the first frame; the rest stream in on a background thread while the game runs.
+MUSIC = 'background_music'
+MANIFEST = [
+    ('sound', SHOOT, EFFECTS[SHOOT][0], True),  # The player can fire on the first frame
+    ('sound', EXPLOSION, EFFECTS[EXPLOSION][0], False),
+    ('sound', POWER_UP, EFFECTS[POWER_UP][0], False),
+    ('music', MUSIC, 'assets/sounds/background.mp3', False),
+]
+
+def read_bytes(name, path, bundle=None):
+    # Music streams from memory once it is in, so the disk read is the part worth moving off
+    # the main thread. Returns the file and its type hint ('mp3'). With an asset bundle
+    # (src/bundle.py) that holds the file, it is copied out of the bundle's map instead.
+    hint = os.path.splitext(path)[1].lstrip('.')
+    if bundle is not None and path in bundle:
+        return bundle.file(path), hint
+    with open(path, 'rb') as f:
+        return io.BytesIO(f.read()), hint
+
+class AssetLoader:
+    # decoders[kind](name, path) does the slow part (file I/O, decoding) and must be safe to run
+    # off the main thread; installers[kind](name, asset) hands the result to the game and only
+    # ever runs on the main thread, from load_critical() or poll().
+    def __init__(self, manifest, decoders, installers):
+        self.manifest = manifest
+        self.decoders = decoders
+        self.installers = installers
+        self.ready = queue.Queue()
+        self.pending = 0
+        self.done = False
+        self.errors = []
+
+    def load(self, kind, name, path):
+        try:
+            return self.decoders[kind](name, path), None
+        except Exception as e:  # A missing or broken asset shouldn't stop the game
+            return None, e
+
+    def install(self, kind, name, path, asset, error):
+        if error is None:
+            self.installers[kind](name, asset)
+        else:
+            self.errors.append((path, error))
+            print(f"Error loading {path}: {error}")
+
+    def load_critical(self):
+        for kind, name, path, critical in self.manifest:
+            if critical:
+                self.install(kind, name, path, *self.load(kind, name, path))
+
+    def load_all(self):
+        # Everything up front, on this thread: for headless runs, which have no frames to keep
+        # smooth and should not depend on thread timing
+        for kind, name, path, _ in self.manifest:
+            self.install(kind, name, path, *self.load(kind, name, path))
+        self.done = True
+
+    def start(self):
+        # Load the non-critical assets on a daemon thread; poll() installs them as they finish
+        deferred = [entry for entry in self.manifest if not entry[3]]
+        self.pending = len(deferred)
+        thread = threading.Thread(target=self._run, args=(deferred,), name='asset-loader', daemon=True)
+        thread.start()
+
+    def _run(self, deferred):
+        for kind, name, path, _ in deferred:
+            self.ready.put((kind, name, path) + self.load(kind, name, path))
+
+    def poll(self):
+        # Install whatever the thread has finished; call once per frame. True once all is in.
+        while self.pending:
+            try:
+                kind, name, path, asset, error = self.ready.get_nowait()
+            except queue.Empty:
+                return False
+            self.install(kind, name, path, asset, error)
+            self.pending -= 1
+        self.done = True
+        return True
@@ -0,0 +1,114 @@
+import argparse
+import asyncio
+import random
+import time
+from src.constants import TICK_RATE
+from src.netcode import (JOIN, WELCOME, FULL, INPUT, LEAVE, SNAPSHOT, WELCOME_PACKET, INPUT_PACKET,
+                         SnapshotReceiver, ClientWorld)
+from src.recording import encode_input
+from src.server import GameServer
+
+class BotClient(asyncio.DatagramProtocol):
+    # One simulated player: joins, holds a random input that changes every half second or so,
+    # sends it every tick like a real client, and decodes every snapshot it gets
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.transport = None
+        self.receiver = SnapshotReceiver()
+        self.world = None
+        self.player_id = None
+        self.full = False
+        self.seq = 0
+        self.bytes_received = 0
+        self.snapshots = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.bytes_received += len(data)
+        if data[0] == WELCOME and self.player_id is None:
+            _, self.player_id, _, _ = WELCOME_PACKET.unpack(data)
+            self.world = ClientWorld(self.player_id)
+        elif data[0] == SNAPSHOT and self.world:
+            received = self.receiver.receive(data)
+            if received:
+                self.world.apply(received[1])
+                self.snapshots += 1
+        elif data[0] == FULL:
+            self.full = True
+
+    async def play(self, tick_rate, until):
+        rng = self.rng
+        controls = (0, 0, False)
+        while time.monotonic() < until and not self.full:
+            if self.player_id is None:
+                self.transport.sendto(bytes([JOIN]))
+            else:
+                if rng.random() < 2 / tick_rate:
+                    controls = (rng.randint(-1, 1), rng.randint(-1, 1), rng.random() < 0.8)
+                self.seq += 1
+                self.transport.sendto(INPUT_PACKET.pack(INPUT, self.seq, self.receiver.ack, encode_input(*controls)))
+            await asyncio.sleep(1 / tick_rate)
+        self.transport.sendto(bytes([LEAVE]))
+
+async def load_test(players, duration, seed=0, host='127.0.0.1', port=7777, connect=False, tick_rate=TICK_RATE):
+    # players bots against an in-process server on loopback (or an already running one with
+    # connect), for duration seconds. Both share this event loop and process, so the server's
+    # tick cost includes competing with the bots for the CPU.
+    loop = asyncio.get_running_loop()
+    server = None
+    if not connect:
+        server = GameServer(seed, tick_rate)
+        server_task = asyncio.create_task(server.serve(host, port, duration + 1))
+        await asyncio.sleep(0.1)
+    bots = []
+    for index in range(players):
+        bot = BotClient(seed * 1000 + index)
+        await loop.create_datagram_endpoint(lambda bot=bot: bot, remote_addr=(host, port))
+        bots.append(bot)
+    start = time.monotonic()
+    await asyncio.gather(*(bot.play(tick_rate, start + duration) for bot in bots))
+    elapsed = time.monotonic() - start
+    for bot in bots:
+        bot.transport.close()
+    result = {
+        'players': players,
+        'joined': sum(bot.player_id is not None for bot in bots),
+        'elapsed': elapsed,
+        'snapshots_decoded': sum(bot.snapshots for bot in bots),
+        'missing_baseline': sum(bot.receiver.missing_baseline for bot in bots),
+        'client_bytes_per_sec': sum(bot.bytes_received for bot in bots) / elapsed / max(players, 1),
+    }
+    if server:
+        server.stop()
+        await server_task
+        result['server'] = server.stats()
+        result['server_phases'] = server.profiler.report_lines()
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load-test the co-op server with simulated players over loopback')
+    parser.add_argument('--players', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to play')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7777)
+    parser.add_argument('--connect', action='store_true', help='Use a server that is already running instead of starting one')
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(load_test(args.players, args.duration, args.seed, args.host, args.port, args.connect))
+    print(f"{result['joined']}/{result['players']} players joined, {result['snapshots_decoded']} snapshots decoded "
+          f"({result['missing_baseline']} dropped for a missing baseline)")
+    print(f"Per client: {result['client_bytes_per_sec'] / 1024:.1f} KiB/s down")
+    if 'server' in result:
+        server = result['server']
+        tick = server['tick_ms']
+        print(f"Server: {server['ticks']} ticks, p50 {tick['p50']:.3f} / p95 {tick['p95']:.3f} / p99 {tick['p99']:.3f} ms "
+              f"per tick, {server['bytes_sent'] / result['elapsed'] / 1024:.1f} KiB/s up, "
+              f"{server['full_snapshots']}/{server['snapshots_sent']} snapshots sent whole")
+        for line in result['server_phases']:
+            print('    ' + line)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+import struct
+import zlib
+from collections import namedtuple
+import numpy as np
+from src.coop import CoopPlayer
+from src.entities import EntityArray
+from src.simulation import ENEMY_SIZE, POWER_UP_SIZE, BULLET_SHAPES
+
+# Co-op wire protocol, one UDP datagram per message, little-endian, type byte first:
+#   JOIN      client -> server  (type)                             resent until WELCOME arrives
+#   WELCOME   server -> client  (type, player id u8, tick rate u16, ticks per snapshot u16)
+#   FULL      server -> client  (type)                             no free player slot
+#   INPUT     client -> server  (type, seq u32, ack u32, input byte)   once per client tick
+#   LEAVE     client -> server  (type)
+#   SNAPSHOT  server -> client  (type, tick u32, baseline tick u32) + zlib payload
+# The input byte is recording.encode_input(dx, dy, shoot). ack is the newest snapshot tick the
+# client has decoded (NO_TICK before the first); the server sends each snapshot as the
+# difference from that one while it still has it, and whole otherwise. Inputs are held state,
+# not edges, so a lost INPUT only delays a change by a tick.
+JOIN, WELCOME, FULL, INPUT, LEAVE, SNAPSHOT = range(1, 7)
+NO_TICK = 0xFFFFFFFF
+WELCOME_PACKET = struct.Struct('<BBHH')
+INPUT_PACKET = struct.Struct('<BIIB')
+SNAPSHOT_HEADER = struct.Struct('<BII')
+
+# Snapshot payload: score u32, round over u8, row counts u16 x 4, then each table of int16
+# rows column by column. Positions are quantized to QUANTUM px.
+#   players   id, x, y, flags (alive | shield << 1 | power-up level << 2)
+#   enemies, bullets, power-ups   x, y, variant
+# A delta payload holds each row minus the baseline's row at the same index (rows past the
+# baseline's count are sent as they are). Entities move a few units per snapshot, so the
+# differences are small repeated numbers that zlib squeezes down to almost nothing.
+PAYLOAD_HEADER = struct.Struct('<IB4H')
+QUANTUM = 0.5
+MAX_SNAPSHOT_BULLETS = 4096  # Past this, the newest bullets are left out of snapshots
+TABLES = ('players', 'enemies', 'bullets', 'power_ups')
+WIDTHS = (4, 3, 3, 3)
+Snapshot = namedtuple('Snapshot', ('score', 'round_over') + TABLES)
+
+def _rows(entities, limit):
+    n = min(entities.count, limit)
+    rows = np.empty((n, 3), dtype=np.int16)
+    rows[:, 0] = np.rint(entities.x[:n] / QUANTUM)
+    rows[:, 1] = np.rint(entities.y[:n] / QUANTUM)
+    rows[:, 2] = entities.variant[:n]
+    return rows
+
+def capture(sim):
+    # The quantized state of a CoopSimulation that goes into a snapshot
+    players = np.array([(player.id, round(player.x / QUANTUM), round(player.y / QUANTUM),
+                         player.alive | player.shield << 1 | player.power_up_level << 2)
+                        for player in sim.players.values()], dtype=np.int16).reshape(-1, 4)
+    return Snapshot(sim.score, sim.game_over, players, _rows(sim.enemies, 1 << 16),
+                    _rows(sim.bullets, MAX_SNAPSHOT_BULLETS), _rows(sim.power_ups, 1 << 16))
+
+def encode(snapshot, baseline=None):
+    tables = snapshot[2:]
+    parts = [PAYLOAD_HEADER.pack(snapshot.score, snapshot.round_over, *map(len, tables))]
+    for index, rows in enumerate(tables):
+        if baseline is not None:
+            base = baseline[2 + index]
+            m = min(len(rows), len(base))
+            rows = rows.copy()
+            rows[:m] -= base[:m]  # int16 wraps around, and wraps back when the client adds
+        parts.append(rows.T.tobytes())  # Column by column, so like values sit together
+    return zlib.compress(b''.join(parts), 1)
+
+def decode(payload, baseline=None):
+    data = zlib.decompress(payload)
+    score, round_over, *counts = PAYLOAD_HEADER.unpack_from(data)
+    offset = PAYLOAD_HEADER.size
+    tables = []
+    for index, (n, width) in enumerate(zip(counts, WIDTHS)):
+        rows = np.frombuffer(data, np.int16, n * width, offset).reshape(width, n).T.copy()
+        offset += 2 * n * width
+        if baseline is not None:
+            base = baseline[2 + index]
+            m = min(n, len(base))
+            rows[:m] += base[:m]
+        tables.append(rows)
+    return Snapshot(score, bool(round_over), *tables)
+
+class SnapshotReceiver:
+    # Client half of the snapshot stream: decodes each snapshot against the baseline it names
+    # and keeps the recent ones as baselines for what comes next. ack goes in every INPUT.
+    HISTORY = 64
+
+    def __init__(self):
+        self.history = {}  # tick -> Snapshot, oldest first
+        self.ack = NO_TICK
+        self.missing_baseline = 0  # Deltas dropped because their baseline was already gone
+
+    def receive(self, packet):
+        # Returns (tick, Snapshot), or None for a late, duplicate or undecodable one
+        _, tick, baseline_tick = SNAPSHOT_HEADER.unpack_from(packet)
+        if self.ack != NO_TICK and tick <= self.ack:
+            return None
+        baseline = None
+        if baseline_tick != NO_TICK:
+            baseline = self.history.get(baseline_tick)
+            if baseline is None:
+                self.missing_baseline += 1
+                return None
+        snapshot = decode(packet[SNAPSHOT_HEADER.size:], baseline)
+        self.history[tick] = snapshot
+        if len(self.history) > self.HISTORY:
+            del self.history[next(iter(self.history))]
+        self.ack = tick
+        return tick, snapshot
+
+# Hitbox size of a bullet by firing angle, indexed by angle + 90
+_BULLET_BOXES = np.zeros((181, 2))
+for _angle, _shape in BULLET_SHAPES.items():
+    _BULLET_BOXES[_angle + 90] = _shape[2:4]
+
+class ClientWorld:
+    # What a client draws: the latest snapshot laid out like a Simulation (enemies, bullets and
+    # power_ups as EntityArrays, player as a Player), with each row's previous position taken
+    # from the snapshot before. lerp(alpha) then interpolates between the last two snapshots
+    # the same way the local renderers interpolate between ticks.
+    SNAP_DISTANCE = 40  # px; a row that moved further was respawned or reordered, so it jumps
+
+    def __init__(self, player_id):
+        self.player_id = player_id
+        self.enemies = EntityArray()
+        self.bullets = EntityArray()
+        self.power_ups = EntityArray()
+        self.players = {}  # player id -> CoopPlayer
+        self.player = None  # This client's own player, once a snapshot has it
+        self.score = 0
+        self.round_over = False
+
+    def apply(self, snapshot):
+        self.score = snapshot.score
+        self.round_over = snapshot.round_over
+        self.load(self.enemies, snapshot.enemies, np.array(ENEMY_SIZE))
+        self.load(self.bullets, snapshot.bullets, _BULLET_BOXES[snapshot.bullets[:, 2].astype(np.intp) + 90])
+        self.load(self.power_ups, snapshot.power_ups, np.array(POWER_UP_SIZE))
+
+        players = {}
+        for player_id, qx, qy, flags in snapshot.players.tolist():
+            player = self.players.get(player_id) or CoopPlayer(player_id, 0, 0)
+            x, y = qx * QUANTUM, qy * QUANTUM
+            near = abs(x - player.x) < self.SNAP_DISTANCE and abs(y - player.y) < self.SNAP_DISTANCE
+            player.prev_x, player.prev_y = (player.x, player.y) if near else (x, y)
+            player.x, player.y = x, y
+            player.alive = bool(flags & 1)
+            player.shield = bool(flags & 2)
+            player.power_up_level = flags >> 2
+            players[player_id] = player
+        self.players = players
+        self.player = players.get(self.player_id)
+
+    def load(self, entities, rows, sizes):
+        n = len(rows)
+        m = min(n, entities.count)
+        entities.reserve(n)
+        x, y, variant = rows[:, 0] * QUANTUM, rows[:, 1] * QUANTUM, rows[:, 2]
+        old_x, old_y = entities.x[:m].copy(), entities.y[:m].copy()
+        same = ((np.abs(old_x - x[:m]) < self.SNAP_DISTANCE) & (np.abs(old_y - y[:m]) < self.SNAP_DISTANCE) &
+                (entities.variant[:m] == variant[:m]))
+        entities.prev_x[:n] = x
+        entities.prev_y[:n] = y
+        entities.prev_x[:m][same] = old_x[same]
+        entities.prev_y[:m][same] = old_y[same]
+        entities.x[:n] = x
+        entities.y[:n] = y
+        entities.variant[:n] = variant
+        entities.width[:n], entities.height[:n] = np.broadcast_to(sizes, (n, 2)).T
+        entities.count = n
@@ -1,22 +1,64 @@
-import pygame
-import random
+import numpy as np
 
-class Particle:
-    def __init__(self, x, y, color, size):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.size = size
-        self.dx = random.uniform(-2, 2)  # Increased speed range
-        self.dy = random.uniform(-2, 2)  # Increased speed range
-        self.lifetime = random.uniform(0.5, 1.5)  # Particle lifetime in seconds
+class ParticleSystem:
+    # Structure-of-arrays particle store. Slots form a fixed-capacity ring: when it is
+    # full, new sparks overwrite the oldest ones instead of allocating.
+    def __init__(self, capacity, palette):
+        self.capacity = capacity
+        self.palette = list(palette)  # Particle colors are stored as indices into this list
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.dx = np.zeros(capacity, dtype=np.float32)  # Pixels per second
+        self.dy = np.zeros(capacity, dtype=np.float32)
+        self.size = np.zeros(capacity, dtype=np.float32)
+        self.lifetime = np.zeros(capacity, dtype=np.float32)  # Seconds left; 0 marks a free slot
+        self.color = np.zeros(capacity, dtype=np.uint8)
+        self.rng = np.random.default_rng()
+        self._head = 0  # Next ring slot to write
+        # Upper bound on the longest remaining lifetime; once it runs out nothing is alive and
+        # the whole-array passes are skipped
+        self.max_lifetime = 0.0
+
+    def emit(self, x, y, count, size_range, speed, lifetime_range):
+        count = min(count, self.capacity)
+        slots = (self._head + np.arange(count)) % self.capacity
+        self._head = (self._head + count) % self.capacity
+        rng = self.rng
+        self.x[slots] = x
+        self.y[slots] = y
+        self.dx[slots] = rng.uniform(-speed, speed, count)
+        self.dy[slots] = rng.uniform(-speed, speed, count)
+        self.size[slots] = rng.uniform(size_range[0], size_range[1], count)
+        self.lifetime[slots] = rng.uniform(lifetime_range[0], lifetime_range[1], count)
+        self.color[slots] = rng.integers(0, len(self.palette), count)
+        self.max_lifetime = max(self.max_lifetime, lifetime_range[1])
 
     def update(self, dt):
-        self.x += self.dx
-        self.y += self.dy
+        if self.max_lifetime <= 0:
+            return
+        self.max_lifetime -= dt
+        self.x += self.dx * dt
+        self.y += self.dy * dt
         self.lifetime -= dt
-        self.size -= dt * (self.size / self.lifetime)  # Gradually decrease size
-        return self.lifetime <= 0 or self.size <= 0
+        # Gradually decrease size so it reaches zero with the lifetime
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.size -= dt * (self.size / self.lifetime)
+        dead = (self.lifetime <= 0) | ~(self.size > 0)
+        self.lifetime[dead] = 0
+        self.size[dead] = 0
+
+    def visible(self, min_size=1):
+        # Indices of live particles that are still large enough to draw
+        if self.max_lifetime <= 0:
+            return np.empty(0, dtype=np.intp)
+        return np.flatnonzero((self.lifetime > 0) & (self.size >= min_size))
+
+    def clear(self):
+        self.lifetime[:] = 0
+        self.size[:] = 0
+        self.max_lifetime = 0.0
 
-    def draw(self, screen):
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), int(self.size))
\ No newline at end of file
+    def __len__(self):
+        if self.max_lifetime <= 0:
+            return 0
+        return int(np.count_nonzero(self.lifetime > 0))
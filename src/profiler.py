@@ -0,0 +1,104 @@
+import csv
+import json
+import time
+from collections import deque
+from contextlib import nullcontext
+
+_DISABLED = nullcontext()  # Shared no-op returned by phase() while profiling is off
+
+class _PhaseTimer:
+    # One reusable timer per phase name, so timing a phase doesn't allocate
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc):
+        current = self.profiler.current
+        current[self.name] = current.get(self.name, 0) + time.perf_counter_ns() - self.start
+
+class FrameProfiler:
+    def __init__(self, window=300, history=36000, enabled=False):
+        self.enabled = enabled
+        self.window = window  # Frames kept for the rolling percentiles
+        self.samples = {}  # phase -> deque of ns per frame, newest last
+        self.history = deque(maxlen=history)  # (frame, {phase: ns}) rows kept for export
+        self.current = {}
+        self.metrics = {}  # One-off measurements in ms (startup times), reported with the phases
+        self.frame = 0
+        self._timers = {}
+        self._frame_start = 0
+        self._enable_next = None  # Set by set_enabled(), applied at the next begin_frame()
+
+    def set_enabled(self, enabled):
+        # Switching mid-frame would time the frame in progress from a stale start and write it
+        # over the row already recorded for the last one, so the switch waits for a new frame
+        self._enable_next = enabled
+
+    def phase(self, name):
+        if not self.enabled:
+            return _DISABLED
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = self._timers[name] = _PhaseTimer(self, name)
+        return timer
+
+    def begin_frame(self):
+        if self._enable_next is not None:
+            self.enabled = self._enable_next
+            self._enable_next = None
+        if self.enabled:
+            self.current = {}
+            self._frame_start = time.perf_counter_ns()
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        current = self.current
+        current['frame'] = time.perf_counter_ns() - self._frame_start
+        for name, ns in current.items():
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.window)
+            samples.append(ns)
+        self.history.append((self.frame, current))
+        self.frame += 1
+
+    def percentiles(self, name, points=(50, 95, 99)):
+        # Nearest-rank percentiles in milliseconds over the rolling window
+        samples = sorted(self.samples.get(name, ()))
+        if not samples:
+            return [0.0 for _ in points]
+        last = len(samples) - 1
+        return [samples[min(last, int(round(point / 100 * last)))] / 1e6 for point in points]
+
+    def report_lines(self):
+        lines = ['phase            p50    p95    p99 ms']
+        for name in self.samples:
+            p50, p95, p99 = self.percentiles(name)
+            lines.append(f'{name:<14} {p50:6.2f} {p95:6.2f} {p99:6.2f}')
+        for name, ms in self.metrics.items():
+            lines.append(f'{name:<14} {ms:6.1f}')
+        return lines
+
+    def dump(self, path, stats=None):
+        # Per-frame phase times in ns; the file extension picks CSV or JSON. JSON also keeps
+        # stats, the front end's counters ({'entities': ..., 'audio': ...}) at the end of the run.
+        phases = list(self.samples)
+        if path.endswith('.json'):
+            with open(path, 'w') as f:
+                json.dump({
+                    'percentiles_ms': {name: dict(zip(('p50', 'p95', 'p99'), self.percentiles(name))) for name in phases},
+                    'metrics_ms': self.metrics,
+                    'stats': stats or {},
+                    'frames': [dict(row, index=frame) for frame, row in self.history],
+                }, f, indent=2)
+        else:
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['index'] + phases)
+                for frame, row in self.history:
+                    writer.writerow([frame] + [row.get(name, 0) for name in phases])
@@ -0,0 +1,82 @@
+from collections import deque, namedtuple
+from src.constants import FPS
+
+# Quality tiers, best first. Front ends read the current tier's knobs:
+#   particles       fraction of the usual sparks per explosion
+#   lifetime        scale on how long sparks live
+#   dirty_rects     repaint only what sprites touched instead of redrawing the whole background
+#   sound_interval  scale on each sound effect's minimum time between starts
+QualityTier = namedtuple('QualityTier', ['name', 'particles', 'lifetime', 'dirty_rects', 'sound_interval'])
+TIERS = [
+    QualityTier('high', 1.0, 1.0, False, 1.0),
+    QualityTier('medium', 0.5, 0.75, False, 1.5),
+    QualityTier('low', 0.25, 0.5, True, 2.0),
+    QualityTier('minimal', 0.1, 0.4, True, 4.0),
+]
+MAX_RECOVER_WINDOWS = 32
+
+class QualityGovernor:
+    # Steps quality down when frames run over budget and back up when there is headroom.
+    # Frame times are judged a window at a time by their 90th percentile: over budget_ms
+    # drops a tier straight away, while a climb needs recover_windows windows in a row under
+    # recover_ms. A climb that gets knocked back down soon after doubles the windows needed
+    # before the next try (up to MAX_RECOVER_WINDOWS), so a device that sits on a tier
+    # boundary doesn't flicker.
+    def __init__(self, budget_ms=1000 / FPS, recover_ms=None, window=60, recover_windows=3, tiers=TIERS):
+        self.budget_ms = budget_ms
+        self.recover_ms = budget_ms * 0.6 if recover_ms is None else recover_ms
+        self.window = window
+        self.base_recover_windows = self.recover_windows = recover_windows
+        self.tiers = tiers
+        self.level = 0  # Index into tiers
+        self.frames = deque(maxlen=window)
+        self.calm_windows = 0
+        self.windows_since_climb = None
+        self.last_p90 = 0.0
+        self.changes = []  # (when, level) each time the tier changed
+
+    @property
+    def tier(self):
+        return self.tiers[self.level]
+
+    def record(self, frame_ms, when=None):
+        # Feed one frame's time; returns True when the tier changed. when (a frame number or
+        # timestamp) is kept with each change for telemetry.
+        frames = self.frames
+        frames.append(frame_ms)
+        if len(frames) < self.window:
+            return False
+        self.last_p90 = p90 = sorted(frames)[int(0.9 * (self.window - 1))]
+        frames.clear()
+        if self.windows_since_climb is not None:
+            self.windows_since_climb += 1
+            if self.windows_since_climb > 2:
+                self.recover_windows = self.base_recover_windows  # The last climb held
+                self.windows_since_climb = None
+        if p90 > self.budget_ms and self.level < len(self.tiers) - 1:
+            if self.windows_since_climb is not None:
+                self.recover_windows = min(self.recover_windows * 2, MAX_RECOVER_WINDOWS)  # The last climb didn't hold
+                self.windows_since_climb = None
+            return self.set_level(self.level + 1, when)
+        if p90 < self.recover_ms and self.level > 0:
+            self.calm_windows += 1
+            if self.calm_windows >= self.recover_windows:
+                self.windows_since_climb = 0
+                return self.set_level(self.level - 1, when)
+        else:
+            self.calm_windows = 0
+        return False
+
+    def set_level(self, level, when=None):
+        self.level = level
+        self.calm_windows = 0
+        self.changes.append((when, level))
+        return True
+
+    def stats(self):
+        return {
+            'tier': self.tier.name,
+            'level': self.level,
+            'frame_ms_p90': self.last_p90,
+            'changes': len(self.changes),
+        }
@@ -0,0 +1,101 @@
+import struct
+
+# Input recordings: the seed a game was started with plus every tick's input, which is all it
+# takes to play the game back exactly. Layout, little-endian:
+#   header    magic 'SFRP', version u8, tick rate u16, checksum interval u32, seed u64
+#   inputs    run count u32, then per run: varint tick count, input byte
+#   checksums count u32, then u32 Simulation.checksum() after every interval-th tick
+# An input byte packs dx+1 (bits 0-1), dy+1 (bits 2-3) and shoot (bit 4); held keys repeat
+# the same byte, so a run of identical ticks is stored once.
+
+MAGIC = b'SFRP'
+VERSION = 2  # 2: hits are checked against pixel masks, so version 1 recordings play out differently
+HEADER = struct.Struct('<4sBHIQ')
+CHECKSUM_INTERVAL = 60  # Ticks between state checksums
+
+def encode_input(dx, dy, shoot):
+    return (dx + 1) | (dy + 1) << 2 | bool(shoot) << 4
+
+def decode_input(code):
+    return (code & 3) - 1, (code >> 2 & 3) - 1, bool(code & 16)
+
+def valid_input(code):
+    # Whether encode_input() could have produced code: 3 in a 2-bit field would decode to a
+    # move of 2, twice the player's speed
+    return code < 32 and code & 3 != 3 and code >> 2 & 3 != 3
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+class InputRecorder:
+    def __init__(self, path, seed, tick_rate, checksum_interval=CHECKSUM_INTERVAL):
+        self.path = path
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.checksum_interval = checksum_interval
+        self.runs = []  # [input byte, ticks]
+        self.checksums = []
+        self.ticks = 0
+
+    def record(self, dx, dy, shoot):
+        code = encode_input(dx, dy, shoot)
+        runs = self.runs
+        if runs and runs[-1][0] == code:
+            runs[-1][1] += 1
+        else:
+            runs.append([code, 1])
+
+    def checkpoint(self, sim):
+        # Call after each recorded tick
+        self.ticks += 1
+        if self.ticks % self.checksum_interval == 0:
+            self.checksums.append(sim.checksum())
+
+    def save(self):
+        data = bytearray(HEADER.pack(MAGIC, VERSION, self.tick_rate, self.checksum_interval, self.seed))
+        data += struct.pack('<I', len(self.runs))
+        for code, ticks in self.runs:
+            _write_varint(data, ticks)
+            data.append(code)
+        data += struct.pack(f'<I{len(self.checksums)}I', len(self.checksums), *self.checksums)
+        with open(self.path, 'wb') as f:
+            f.write(data)
+
+class Recording:
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, self.tick_rate, self.checksum_interval, self.seed = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a version {VERSION} Space Fighter recording')
+        offset = HEADER.size
+        (run_count,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+        self.runs = []
+        for _ in range(run_count):
+            ticks, offset = _read_varint(data, offset)
+            self.runs.append((data[offset], ticks))
+            offset += 1
+        (checksum_count,) = struct.unpack_from('<I', data, offset)
+        self.checksums = list(struct.unpack_from(f'<{checksum_count}I', data, offset + 4))
+        self.ticks = sum(ticks for _, ticks in self.runs)
+
+    def inputs(self):
+        # (dx, dy, shoot) for every recorded tick, in order
+        for code, ticks in self.runs:
+            controls = decode_input(code)
+            for _ in range(ticks):
+                yield controls
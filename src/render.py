@@ -0,0 +1,43 @@
+import pygame
+
+class DirtyRectRenderer:
+    # Stands in for the screen Surface in draw code (blit/blits have the same signatures) and
+    # remembers every rect it touches. Next frame it restores the background under those rects
+    # only, and hands both frames' rects to display.update() instead of flipping the whole screen.
+    def __init__(self, screen, background, max_rects=400):
+        self.screen = screen
+        self.background = background
+        self.max_rects = max_rects  # Past this many rects a full repaint is cheaper
+        self.previous = []
+        self.current = []
+        self.full_redraw = True
+
+    def invalidate(self):
+        self.full_redraw = True
+
+    def begin(self):
+        if self.full_redraw or len(self.previous) > self.max_rects:
+            self.full_redraw = True
+            self.screen.blit(self.background, (0, 0))
+        else:
+            background = self.background
+            self.screen.blits([(background, rect, rect) for rect in self.previous], doreturn=False)
+        self.current = []
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        rect = self.screen.blit(source, dest, area, special_flags)
+        self.current.append(rect)
+        return rect
+
+    def blits(self, blit_sequence, doreturn=True):
+        rects = self.screen.blits(blit_sequence)
+        self.current.extend(rects)
+        return rects if doreturn else None
+
+    def end(self):
+        if self.full_redraw or len(self.current) > self.max_rects:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.previous + self.current)
+        self.full_redraw = False
+        self.previous = self.current
@@ -0,0 +1,73 @@
+import argparse
+import sys
+import time
+from src.constants import GAME_OVER
+from src.game import Game, Controls
+from src.recording import Recording
+
+def replay(path, draw=False, profile_path=None, slowest=5):
+    # Re-drive a recorded game headless as fast as possible, checking the simulation against
+    # the recorded checksums. With draw, every tick is also rendered, so slow frames can be
+    # profiled; profile_path keeps the per-tick phase times (.csv or .json). A recording that
+    # goes on after a game over restarts in place, as the player did. The simulation steps at
+    # the recording's own tick rate, which need not be today's TICK_RATE.
+    recording = Recording(path)
+    game = Game(headless=True, seed=recording.seed, profile_path=profile_path, tick_rate=recording.tick_rate)
+    profiler = game.profiler
+    profiler.enabled = True
+    checksums = iter(recording.checksums)
+    mismatch = None
+    ticks = 0
+    games = 1
+    start = time.perf_counter()
+    for dx, dy, shoot in recording.inputs():
+        if game.state == GAME_OVER:
+            game.reset_game()
+            games += 1
+        profiler.begin_frame()
+        game.update(Controls(dx, dy, shoot))
+        if draw:
+            game.draw()
+        profiler.end_frame()
+        ticks += 1
+        if ticks % recording.checksum_interval == 0:
+            expected = next(checksums, None)
+            if expected is not None and expected != game.sim.checksum() and mismatch is None:
+                mismatch = ticks  # First tick where the replay diverged from the recording
+    elapsed = time.perf_counter() - start
+    if profile_path:
+        profiler.dump(profile_path)
+
+    frames = sorted(profiler.history, key=lambda row: row[1]['frame'], reverse=True)[:slowest]
+    return {
+        'ticks': ticks,
+        'recorded_ticks': recording.ticks,
+        'games': games,
+        'score': game.score,
+        'mismatch_tick': mismatch,
+        'elapsed': elapsed,
+        'ticks_per_sec': ticks / elapsed if elapsed else float('inf'),
+        'slowest': [(frame + 1, row) for frame, row in frames],  # (tick, {phase: ns})
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay a recorded Space Fighter game headlessly and verify it')
+    parser.add_argument('recording')
+    parser.add_argument('--draw', action='store_true', help='Render every tick too, to reproduce slow frames')
+    parser.add_argument('--profile', help='Write per-tick phase times here (.csv or .json)')
+    parser.add_argument('--slowest', type=int, default=5, help='How many of the slowest ticks to list')
+    args = parser.parse_args(argv)
+
+    result = replay(args.recording, args.draw, args.profile, args.slowest)
+    print(f"Replayed {result['ticks']}/{result['recorded_ticks']} ticks in {result['elapsed']:.2f}s "
+          f"({result['ticks_per_sec']:.0f} ticks/s), {result['games']} game(s), final score {result['score']}")
+    for tick, row in result['slowest']:
+        phases = ', '.join(f'{name} {ns / 1e6:.2f}' for name, ns in row.items() if name != 'frame')
+        print(f"    tick {tick}: {row['frame'] / 1e6:.2f} ms ({phases})")
+    if result['mismatch_tick'] is not None:
+        print(f"Diverged from the recording by tick {result['mismatch_tick']}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
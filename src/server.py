@@ -0,0 +1,169 @@
+import argparse
+import asyncio
+import time
+from src.constants import TICK_RATE, MAX_FRAME_TIME
+from src.coop import CoopSimulation
+from src.netcode import (JOIN, WELCOME, FULL, INPUT, LEAVE, SNAPSHOT, NO_TICK, WELCOME_PACKET, INPUT_PACKET,
+                         SNAPSHOT_HEADER, capture, encode)
+from src.profiler import FrameProfiler
+from src.recording import decode_input, valid_input
+
+SNAPSHOT_INTERVAL = 3  # Ticks per snapshot: 20 a second at the default tick rate
+CLIENT_TIMEOUT = 5.0  # Seconds of silence before a player is dropped
+ROUND_RESTART_DELAY = 3.0  # Seconds between everyone being out and the next round
+HISTORY = 32  # Snapshots kept as delta baselines; older acks get a whole snapshot
+
+class Client:
+    __slots__ = ('player_id', 'input', 'seq', 'ack', 'last_seen')
+
+    def __init__(self, player_id, now):
+        self.player_id = player_id
+        self.input = (0, 0, False)
+        self.seq = -1
+        self.ack = NO_TICK
+        self.last_seen = now
+
+class GameServer(asyncio.DatagramProtocol):
+    # Authoritative co-op server: the only copy of the game that counts is the CoopSimulation
+    # here, stepped at a fixed tick from the players' latest inputs. Every SNAPSHOT_INTERVAL
+    # ticks each client is sent the quantized world, as a delta against the last snapshot it
+    # acknowledged. Tick cost is profiled in phases (simulate, snapshot, send).
+    def __init__(self, seed=None, tick_rate=TICK_RATE, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.profiler = FrameProfiler(enabled=True)
+        self.sim = CoopSimulation(seed, tick_rate)
+        self.tick_rate = tick_rate
+        self.snapshot_interval = snapshot_interval
+        self.clients = {}  # address -> Client
+        self.history = {}  # snapshot tick -> Snapshot, oldest first
+        self.transport = None
+        self.tick = 0  # Server ticks since start; unlike sim.ticks this never resets
+        self.round_over_ticks = 0
+        self.running = False
+        self.bytes_sent = 0
+        self.snapshots_sent = 0
+        self.full_snapshots = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if not data:
+            return
+        kind = data[0]
+        client = self.clients.get(addr)
+        if kind == INPUT and client and len(data) == INPUT_PACKET.size:
+            _, seq, ack, code = INPUT_PACKET.unpack(data)
+            if not valid_input(code):
+                return  # Only a tampered client sends these; the server decides how fast players move
+            client.last_seen = time.monotonic()
+            if seq > client.seq:  # Datagrams can arrive out of order
+                client.seq = seq
+                client.input = decode_input(code)
+                if ack != NO_TICK and (client.ack == NO_TICK or ack > client.ack):
+                    client.ack = ack
+        elif kind == JOIN:
+            if client is None:
+                player_id = self.sim.add_player()
+                if player_id is None:
+                    self.transport.sendto(bytes([FULL]), addr)
+                    return
+                client = self.clients[addr] = Client(player_id, time.monotonic())
+            # Sent again for a repeated JOIN, in case the first WELCOME was lost
+            self.transport.sendto(WELCOME_PACKET.pack(WELCOME, client.player_id, self.tick_rate,
+                                                      self.snapshot_interval), addr)
+        elif kind == LEAVE and client:
+            self.drop(addr)
+
+    def drop(self, addr):
+        client = self.clients.pop(addr)
+        self.sim.remove_player(client.player_id)
+
+    def step(self):
+        # One server tick: advance the game, then snapshot it on every snapshot_interval-th tick
+        profiler = self.profiler
+        profiler.begin_frame()
+        self.tick += 1
+        with profiler.phase('simulate'):
+            now = time.monotonic()
+            for addr in [addr for addr, client in self.clients.items() if now - client.last_seen > CLIENT_TIMEOUT]:
+                self.drop(addr)
+            sim = self.sim
+            if sim.game_over:
+                self.round_over_ticks += 1
+                if self.round_over_ticks >= ROUND_RESTART_DELAY * self.tick_rate:
+                    sim.reset()
+                    self.round_over_ticks = 0
+            else:
+                sim.step({client.player_id: client.input for client in self.clients.values()})
+        if self.tick % self.snapshot_interval == 0 and self.clients:
+            self.broadcast()
+        profiler.end_frame()
+
+    def broadcast(self):
+        with self.profiler.phase('snapshot'):
+            snapshot = capture(self.sim)
+            self.history[self.tick] = snapshot
+            if len(self.history) > HISTORY:
+                del self.history[next(iter(self.history))]
+        with self.profiler.phase('send'):
+            packets = {}  # Baseline tick -> packet; most clients have acked the same few ticks
+            for addr, client in self.clients.items():
+                baseline_tick = client.ack if client.ack in self.history else NO_TICK
+                packet = packets.get(baseline_tick)
+                if packet is None:
+                    payload = encode(snapshot, self.history.get(baseline_tick))
+                    packet = packets[baseline_tick] = SNAPSHOT_HEADER.pack(SNAPSHOT, self.tick, baseline_tick) + payload
+                if baseline_tick == NO_TICK:
+                    self.full_snapshots += 1
+                self.transport.sendto(packet, addr)
+                self.bytes_sent += len(packet)
+                self.snapshots_sent += 1
+
+    async def serve(self, host='0.0.0.0', port=7777, duration=None):
+        # Run the tick loop until stop() is called or duration seconds have passed
+        loop = asyncio.get_running_loop()
+        await loop.create_datagram_endpoint(lambda: self, local_addr=(host, port))
+        self.running = True
+        dt = 1.0 / self.tick_rate
+        start = next_tick = loop.time()
+        try:
+            while self.running and (duration is None or loop.time() - start < duration):
+                self.step()
+                next_tick += dt
+                delay = next_tick - loop.time()
+                if delay < -MAX_FRAME_TIME / 1000:
+                    next_tick = loop.time()  # Too far behind to catch up; drop the time instead
+                await asyncio.sleep(max(delay, 0))
+        finally:
+            self.transport.close()
+
+    def stop(self):
+        self.running = False
+
+    def stats(self):
+        return {
+            'ticks': self.tick,
+            'clients': len(self.clients),
+            'snapshots_sent': self.snapshots_sent,
+            'full_snapshots': self.full_snapshots,
+            'bytes_sent': self.bytes_sent,
+            'tick_ms': dict(zip(('p50', 'p95', 'p99'), self.profiler.percentiles('frame'))),
+        }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run an authoritative Space Fighter co-op server')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=7777)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--snapshot-interval', type=int, default=SNAPSHOT_INTERVAL, help='Ticks per snapshot')
+    args = parser.parse_args(argv)
+
+    server = GameServer(args.seed, snapshot_interval=args.snapshot_interval)
+    print(f'Serving on {args.host}:{args.port} (UDP)')
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
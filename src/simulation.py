@@ -0,0 +1,387 @@
+import math
+import random
+import struct
+import zlib
+import numpy as np
+from src.constants import SCREEN_WIDTH, SCREEN_HEIGHT, TICK_RATE
+from src.entities import EntityArray
+from src.hitmask import HitMasks, overlap
+from src.profiler import FrameProfiler
+from src.spatial_hash import SpatialHash
+
+# Rendering-agnostic game rules shared by the pygame build (src/game.py) and the Kivy build
+# (main.py). World coordinates are pixels with y pointing down; speeds are pixels per second.
+
+# Power-up types
+SHIELD, RAPID_FIRE, BOMB, SPEED_BOOST = range(4)
+
+# Events a front end reacts to (sounds, particles) after each step: (kind, x, y)
+SHOOT, EXPLOSION, POWER_UP = 'shoot', 'explosion', 'power_up'
+
+PLAYER_SIZE = (100, 100)
+ENEMY_SIZE = (30, 40)
+BULLET_SIZE = (5, 10)
+POWER_UP_SIZE = (20, 20)
+
+PLAYER_SPEED = 120
+SPEED_BOOST_SPEED = 180
+SPEED_BOOST_TIME = 5.0
+RAPID_FIRE_TIME = 10.0
+SHOOT_DELAY = 0.2  # Seconds between shots while the trigger is held
+ENEMY_SPEED = 24
+BULLET_SPEED = 84
+POWER_UP_SPEED = 24
+ENEMY_COUNT = 5  # Enemies on screen; destroyed and escaped ones are replaced
+MAX_POWER_UPS = 3
+POWER_UP_INTERVAL = 10.0
+DIFFICULTY_INTERVAL = 30.0
+UFO_CHANCE = 0.2
+PAIRWISE_LIMIT = 1 << 21  # Enemy x bullet pairs up to which one overlap matrix beats the spatial hash
+
+BULLET_ANGLES = [
+    [0],
+    [-15, 0, 15],
+    [-30, -15, 0, 15, 30],
+    [-45, -30, -15, 0, 15, 30, 45],
+]
+
+def bullet_shape(angle):
+    # (dx, dy, width, height, vx, vy) for a shot at angle: the hitbox is the bounding box of the
+    # rotated laser, offset by dx/dy so it's centred on the muzzle
+    radians = math.radians(angle)
+    sin, cos = abs(math.sin(radians)), abs(math.cos(radians))
+    width = BULLET_SIZE[0] * cos + BULLET_SIZE[1] * sin
+    height = BULLET_SIZE[0] * sin + BULLET_SIZE[1] * cos
+    return (-width / 2, -height / 2, width, height, BULLET_SPEED * math.sin(radians), -BULLET_SPEED * math.cos(radians))
+
+# Worked out once per angle rather than per shot
+BULLET_SHAPES = {angle: bullet_shape(angle) for angles in BULLET_ANGLES for angle in angles}
+
+# Sprite pixel masks; pairs whose rects overlap only count as hits if solid pixels touch
+HIT_MASKS = HitMasks.load()
+
+class Entity:
+    # A single entity, used for the player; everything else lives in EntityArrays
+    __slots__ = ('x', 'y', 'prev_x', 'prev_y', 'width', 'height', 'vx', 'vy')
+
+    def __init__(self, x, y, width, height):
+        self.x = self.prev_x = float(x)
+        self.y = self.prev_y = float(y)
+        self.width = width
+        self.height = height
+        self.vx = self.vy = 0.0
+
+    def move(self, dt):
+        self.prev_x = self.x
+        self.prev_y = self.y
+        self.x += self.vx * dt
+        self.y += self.vy * dt
+
+    @property
+    def center(self):
+        return (self.x + self.width / 2, self.y + self.height / 2)
+
+class Player(Entity):
+    __slots__ = ('speed', 'shield', 'power_up_level', 'speed_boost_timer', 'rapid_fire_timer', 'shoot_timer')
+
+    def __init__(self, x, y):
+        super().__init__(x - PLAYER_SIZE[0] / 2, y - PLAYER_SIZE[1] / 2, *PLAYER_SIZE)
+        self.speed = PLAYER_SPEED
+        self.shield = False
+        self.power_up_level = 0
+        self.speed_boost_timer = 0.0
+        self.rapid_fire_timer = 0.0
+        self.shoot_timer = SHOOT_DELAY  # Ready to fire straight away
+
+class Simulation:
+    def __init__(self, seed=None, tick_rate=TICK_RATE, profiler=None, masks=HIT_MASKS):
+        self.random = random.Random(seed)
+        self.masks = masks  # None for plain rect collisions
+        self.dt = 1.0 / tick_rate
+        self.profiler = profiler or FrameProfiler()
+        self.bullet_grid = SpatialHash()
+        self.enemies = EntityArray()
+        self.bullets = EntityArray()
+        self.power_ups = EntityArray()
+        self.events = []  # Filled during step(), read by the front end before the next one
+        self.reset()
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.random.seed(seed)
+        self.player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 100)
+        self.enemies.clear()
+        self.bullets.clear()
+        self.power_ups.clear()
+        for _ in range(ENEMY_COUNT):
+            self.spawn_enemy()
+        self.events = []
+        self.score = 0
+        self.time = 0.0
+        self.ticks = 0
+        self.game_over = False
+        self.power_up_spawn_timer = 0.0
+        self.power_up_spawn_interval = POWER_UP_INTERVAL
+        self.difficulty_timer = 0.0
+
+    def step(self, dx=0, dy=0, shoot=False):
+        # Advance one fixed tick. dx/dy in -1..1, shoot is whether the trigger is held.
+        # Returns False once the player has been hit.
+        if self.game_over:
+            return False
+        self.events = []
+        self.time += self.dt
+        self.ticks += 1
+        profiler = self.profiler
+        with profiler.phase('input'):
+            self.handle_input(dx, dy, shoot)
+        with profiler.phase('movement'):
+            self.move_entities()
+        with profiler.phase('collisions'):
+            alive = self.check_collisions()
+        with profiler.phase('difficulty'):
+            self.update_timers()
+        self.game_over = not alive
+        return alive
+
+    def handle_input(self, dx, dy, shoot):
+        self.move_player(self.player, dx, dy, shoot)
+
+    def move_player(self, player, dx, dy, shoot):
+        dt = self.dt
+        if dx != 0 and dy != 0:
+            # Normalize diagonal movement
+            dx *= 0.7071
+            dy *= 0.7071
+        player.vx = dx * player.speed
+        player.vy = dy * player.speed
+        player.move(dt)
+        player.x = min(max(player.x, 0), SCREEN_WIDTH - player.width)
+        player.y = min(max(player.y, 0), SCREEN_HEIGHT - player.height)
+
+        player.shoot_timer += dt
+        if shoot and player.shoot_timer >= SHOOT_DELAY:
+            self.shoot(player)
+            player.shoot_timer = 0.0
+
+    def shoot(self, player=None):
+        player = player or self.player
+        x, y = player.x + player.width / 2, player.y
+        for angle in BULLET_ANGLES[player.power_up_level]:
+            dx, dy, width, height, vx, vy = BULLET_SHAPES[angle]
+            self.bullets.add(x + dx, y + dy, width, height, vx, vy, angle)
+        self.events.append((SHOOT, x, y))
+
+    def spawn_enemy(self, index=None, x=None, y=None):
+        # Appends a new enemy, or respawns the one in row index
+        rng = self.random
+        if x is None:
+            x = rng.randint(0, SCREEN_WIDTH - ENEMY_SIZE[0])
+        if y is None:
+            y = rng.randint(-150, -50)
+        variant = 1 if rng.random() < UFO_CHANCE else 0
+        if index is None:
+            self.enemies.add(x, y, *ENEMY_SIZE, 0.0, ENEMY_SPEED, variant)
+        else:
+            self.enemies.set(index, x, y, *ENEMY_SIZE, 0.0, ENEMY_SPEED, variant)
+
+    def spawn_power_up(self):
+        if len(self.power_ups) < MAX_POWER_UPS:  # Limit the number of power-ups on screen
+            x = self.random.randint(0, SCREEN_WIDTH - POWER_UP_SIZE[0])
+            power_up_type = self.random.randint(0, 3)
+            self.power_ups.add(x, -POWER_UP_SIZE[1], *POWER_UP_SIZE, 0.0, POWER_UP_SPEED, power_up_type)
+
+    def move_entities(self):
+        dt = self.dt
+        enemies, bullets, power_ups = self.enemies, self.bullets, self.power_ups
+        enemies.move(dt)
+        bullets.move(dt)
+        power_ups.move(dt)
+
+        # Escaped enemies come back from the top
+        for index in (enemies.y[:enemies.count] > SCREEN_HEIGHT).nonzero()[0].tolist():
+            self.spawn_enemy(index)
+
+        # Angled shots leave through the sides, so cull on every edge
+        n = bullets.count
+        if n:
+            x, y = bullets.x[:n], bullets.y[:n]
+            bullets.remove((y + bullets.height[:n] < 0) | (x + bullets.width[:n] < 0) |
+                           (x > SCREEN_WIDTH) | (y > SCREEN_HEIGHT))
+
+        if power_ups.count:
+            power_ups.remove(power_ups.y[:power_ups.count] > SCREEN_HEIGHT)
+
+    def check_collisions(self):
+        self.check_bullet_hits()
+        return self.check_player(self.player)
+
+    def check_bullet_hits(self):
+        enemies, bullets = self.enemies, self.bullets
+
+        # Bullet-enemy: each enemy is destroyed by the lowest-numbered unspent bullet it overlaps
+        if not (enemies.count and bullets.count):
+            destroyed = []
+        elif enemies.count * bullets.count <= PAIRWISE_LIMIT:
+            destroyed, spent = self.bullet_hits_pairwise()
+        else:
+            destroyed, spent = self.bullet_hits_grid()
+
+        if destroyed:
+            bullets.remove(spent)
+            for enemy in destroyed:
+                self.destroy_enemy(enemy)
+                self.spawn_enemy(enemy)
+
+    def check_player(self, player):
+        # Returns False if player was hit without a shield
+        enemies, power_ups = self.enemies, self.power_ups
+
+        # Player-enemy
+        hits = enemies.overlapping(player.x, player.y, player.width, player.height).nonzero()[0].tolist()
+        if hits and self.masks is not None:
+            hits = [enemy for enemy in hits if self.player_touches(player, enemy)]
+        if hits:
+            if not player.shield:
+                return False  # End the game if player collides with enemy
+            player.shield = False  # The shield absorbs one hit per tick
+            enemy = hits[0]
+            self.events.append((EXPLOSION,) + enemies.center(enemy))
+            mask = np.zeros(enemies.count, dtype=bool)
+            mask[enemy] = True
+            enemies.remove(mask)
+
+        # Player-power-up
+        if power_ups.count:
+            collected = power_ups.overlapping(player.x, player.y, player.width, player.height)
+            power_up_types = power_ups.variant[:power_ups.count][collected].tolist()
+            power_ups.remove(collected)
+            for power_up_type in power_up_types:
+                self.apply_power_up(power_up_type, player)
+
+        return True
+
+    def bullet_hits_pairwise(self):
+        # Few enough pairs to test them all in one broadcast, rather than building the grid
+        enemies, bullets = self.enemies, self.bullets
+        spent = np.zeros(bullets.count, dtype=bool)
+        destroyed = []
+        hits = enemies.overlap_matrix(bullets)
+        for enemy in hits.any(axis=1).nonzero()[0].tolist():
+            for bullet in (hits[enemy] & ~spent).nonzero()[0].tolist():
+                if self.bullet_touches(enemy, bullet):
+                    spent[bullet] = True
+                    destroyed.append(enemy)
+                    break
+        return destroyed, spent
+
+    def bullet_hits_grid(self):
+        # Bucket bullets by grid cell so each enemy only tests nearby bullets
+        enemies, bullets = self.enemies, self.bullets
+        grid = self.bullet_grid
+        grid.clear()
+        bullet_rects = bullets.rects()
+        for index, rect in enumerate(bullet_rects):
+            grid.insert(index, rect)
+
+        spent = np.zeros(bullets.count, dtype=bool)
+        destroyed = []
+        for enemy, (x, y, width, height) in enumerate(enemies.rects()):
+            for bullet in sorted(grid.query((x, y, width, height))):
+                if spent[bullet]:
+                    continue
+                bx, by, bw, bh = bullet_rects[bullet]
+                if (x < bx + bw and bx < x + width and y < by + bh and by < y + height and
+                        self.bullet_touches(enemy, bullet)):
+                    spent[bullet] = True
+                    destroyed.append(enemy)
+                    break  # Each bullet destroys at most one enemy
+        return destroyed, spent
+
+    def bullet_touches(self, enemy, bullet):
+        # Narrow phase for an enemy and bullet whose rects overlap
+        masks = self.masks
+        if masks is None:
+            return True
+        enemies, bullets = self.enemies, self.bullets
+        return overlap(masks.enemies[enemies.variant[enemy]], enemies.x[enemy], enemies.y[enemy],
+                       masks.bullets[int(bullets.variant[bullet])], bullets.x[bullet], bullets.y[bullet])
+
+    def player_touches(self, player, enemy):
+        enemies = self.enemies
+        return overlap(self.masks.player, player.x, player.y,
+                       self.masks.enemies[enemies.variant[enemy]], enemies.x[enemy], enemies.y[enemy])
+
+    def destroy_enemy(self, index):
+        self.score += 1
+        self.events.append((EXPLOSION,) + self.enemies.center(index))
+
+    def apply_power_up(self, power_up_type, player=None):
+        player = player or self.player
+        if power_up_type == SHIELD:
+            player.shield = True
+        elif power_up_type == RAPID_FIRE:
+            player.power_up_level = min(player.power_up_level + 1, len(BULLET_ANGLES) - 1)
+            player.rapid_fire_timer = RAPID_FIRE_TIME
+        elif power_up_type == BOMB:
+            for enemy in range(len(self.enemies)):
+                self.destroy_enemy(enemy)
+            self.enemies.clear()
+            for _ in range(ENEMY_COUNT):
+                self.spawn_enemy()
+        elif power_up_type == SPEED_BOOST:
+            player.speed = SPEED_BOOST_SPEED
+            player.speed_boost_timer = SPEED_BOOST_TIME
+        self.events.append((POWER_UP,) + player.center)
+
+    def update_timers(self):
+        self.update_player_timers(self.player)
+        self.update_spawn_timers()
+
+    def update_player_timers(self, player):
+        dt = self.dt
+        if player.speed_boost_timer > 0:
+            player.speed_boost_timer -= dt
+            if player.speed_boost_timer <= 0:
+                player.speed = PLAYER_SPEED
+        if player.rapid_fire_timer > 0:
+            player.rapid_fire_timer -= dt
+            if player.rapid_fire_timer <= 0:
+                player.power_up_level = max(0, player.power_up_level - 1)
+                if player.power_up_level:
+                    player.rapid_fire_timer = RAPID_FIRE_TIME  # Step down one level at a time
+
+    def update_spawn_timers(self):
+        dt = self.dt
+        self.power_up_spawn_timer += dt
+        if self.power_up_spawn_timer >= self.power_up_spawn_interval:
+            self.spawn_power_up()
+            self.power_up_spawn_timer = 0.0
+
+        self.difficulty_timer += dt
+        if self.difficulty_timer >= DIFFICULTY_INTERVAL:
+            self.increase_difficulty()
+            self.difficulty_timer = 0.0
+
+    def checksum(self):
+        # CRC32 of the state that decides how the game plays out, for checking replays
+        player = self.player
+        crc = zlib.crc32(struct.pack('<IIdd??Bdd', self.ticks, self.score, player.x, player.y, player.shield,
+                                     self.game_over, player.power_up_level, player.speed, self.power_up_spawn_interval))
+        for entities in (self.enemies, self.bullets, self.power_ups):
+            n = entities.count
+            for column in (entities.x, entities.y, entities.vy, entities.variant):
+                crc = zlib.crc32(column[:n].tobytes(), crc)
+        return crc
+
+    def entity_stats(self):
+        return {'enemies': self.enemies.stats(), 'bullets': self.bullets.stats(), 'power_ups': self.power_ups.stats()}
+
+    def entity_report_lines(self):
+        # Row reuse per entity type, for the profiler overlay
+        return [f'{name:<14} {stats["reused"]}/{stats["spawns"]} reused, {stats["grows"]} grows, '
+                f'{stats["capacity"]} rows' for name, stats in self.entity_stats().items()]
+
+    def increase_difficulty(self):
+        self.enemies.vy[:self.enemies.count] *= 1.1
+        self.power_up_spawn_interval *= 0.9
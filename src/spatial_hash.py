@@ -0,0 +1,39 @@
+class SpatialHash:
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}  # (col, row) -> list of items overlapping that cell
+
+    def clear(self):
+        self.cells.clear()
+
+    def _cell_range(self, rect):
+        # rect is anything indexable as (x, y, width, height): pygame.Rect or a plain tuple
+        size = self.cell_size
+        x, y, w, h = rect[0], rect[1], rect[2], rect[3]
+        return (int(x // size), int((x + w) // size),
+                int(y // size), int((y + h) // size))
+
+    def insert(self, item, rect):
+        left, right, bottom, top = self._cell_range(rect)
+        cells = self.cells
+        for col in range(left, right + 1):
+            for row in range(bottom, top + 1):
+                bucket = cells.get((col, row))
+                if bucket is None:
+                    cells[(col, row)] = [item]
+                else:
+                    bucket.append(item)
+
+    def query(self, rect):
+        # Items sharing at least one cell with rect, each reported once, in a stable order
+        left, right, bottom, top = self._cell_range(rect)
+        cells = self.cells
+        found = []
+        seen = set()
+        for col in range(left, right + 1):
+            for row in range(bottom, top + 1):
+                for item in cells.get((col, row), ()):
+                    if id(item) not in seen:
+                        seen.add(id(item))
+                        found.append(item)
+        return found